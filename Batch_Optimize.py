@@ -0,0 +1,160 @@
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Headless: never pick an interactive matplotlib backend or touch tkinter.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+LAYER_PATTERNS = ("*.txt", "*.hpl")
+
+
+def expand_inputs(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for pattern in LAYER_PATTERNS:
+                files.extend(glob.glob(os.path.join(item, pattern)))
+        elif glob.has_magic(item):
+            files.extend(glob.glob(item))
+        else:
+            files.append(item)
+    return sorted(dict.fromkeys(files))
+
+
+def output_path(file_path, out_dir, fmt):
+    name = os.path.basename(file_path)
+    if fmt != "same":
+        name = os.path.splitext(name)[0] + "." + fmt
+    return os.path.join(out_dir, name)
+
+
+def add_output_arguments(parser):
+    parser.add_argument("--format", choices=("same", "txt", "hpl", "gcode"), default="same",
+                        help="output format (default: same as the input file)")
+    parser.add_argument("--scale", type=float, default=1.0, help="G-code millimetres per cell")
+    parser.add_argument("--offset", type=float, nargs=2, default=(0.0, 0.0), metavar=("X", "Y"),
+                        help="G-code position of cell (0, 0)")
+    parser.add_argument("--feed", type=float, default=None, help="G-code feed rate")
+
+
+def toolpath_options(args):
+    # save_path() options for --format gcode, else None.
+    if args.format != "gcode":
+        return None
+    return {"scale": args.scale, "offset": tuple(args.offset), "feed": args.feed}
+
+
+def optimize_file(task):
+    from GA3 import HamiltonianZoningWithEdges
+
+    from Search import make_strategy
+
+    file_path, out_path, generations, time_budget, seed, with_stats, strategy, zones, toolpath, reseed = task
+    summary = {"file": file_path, "output": out_path}
+    try:
+        random.seed(seed)
+        zoning = HamiltonianZoningWithEdges.from_file(file_path)
+        if zones:
+            zoning.load_zone_map(zones)
+        if len(zoning.path) != zoning.width * zoning.height:
+            raise ValueError("edges do not form a single Hamiltonian path")
+        summary.update(width=zoning.width, height=zoning.height, initial_crossings=zoning.fitness)
+        if reseed:
+            summary.update(seed=zoning.reseed(reseed), seeded_crossings=zoning.fitness)
+        if with_stats:
+            zoning.instrument()
+
+        start = time.perf_counter()
+        strategy = make_strategy(strategy, seed=seed) if strategy else None
+        final = zoning.evolve(generations, time_budget=time_budget, strategy=strategy)
+        seconds = time.perf_counter() - start
+
+        if toolpath is not None:
+            zoning.save_path(out_path, **toolpath)
+        else:
+            zoning.save_path(out_path)
+        summary.update(
+            final_crossings=final,
+            seconds=round(seconds, 3),
+            generations=zoning.generations_run,
+            moves_per_sec=round(zoning.generations_run / seconds, 1) if seconds > 0 else None,
+        )
+        if with_stats:
+            summary["stats"] = zoning.stats.summary()
+    except Exception as err:
+        summary["error"] = f"{type(err).__name__}: {err}"
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize layer files without a display.")
+    parser.add_argument("inputs", nargs="+", help="layer files, directories or glob patterns")
+    parser.add_argument("--out", default="optimized", help="output directory (default: optimized)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds of evolve() per file")
+    parser.add_argument("--generations", type=int, default=None,
+                        help="generation limit per file (default: 10000 without --time-budget)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed; file i uses seed + i")
+    parser.add_argument("--summary", default=None, help="summary JSON path (default: OUT/summary.json)")
+    parser.add_argument("--strategy", choices=("greedy", "anneal", "tabu"), default=None,
+                        help="search strategy for evolve() (default: plain greedy mutate)")
+    parser.add_argument("--zones", default=None,
+                        help="zone map (.txt/.csv/.npy/.hpl) for every file, replacing stored or default zones")
+    parser.add_argument("--reseed", default=None, metavar="SEED",
+                        help="replace each path with a constructed one: 'auto' or a Seeds.SEEDS name")
+    add_output_arguments(parser)
+    parser.add_argument("--stats", action="store_true",
+                        help="record per-operator counts and timings in the summary")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        parser.error("no layer files matched")
+    generations = args.generations
+    if generations is None and args.time_budget is None:
+        generations = 10000
+
+    os.makedirs(args.out, exist_ok=True)
+    toolpath = toolpath_options(args)
+    tasks = [
+        (path, output_path(path, args.out, args.format), generations, args.time_budget,
+         args.seed + i, args.stats, args.strategy, args.zones, toolpath, args.reseed)
+        for i, path in enumerate(files)
+    ]
+
+    if args.jobs <= 1:
+        results = map(optimize_file, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(args.jobs)
+        results = pool.map(optimize_file, tasks)
+
+    summaries = []
+    try:
+        for summary in results:
+            summaries.append(summary)
+            if "error" in summary:
+                print(f"{summary['file']}: FAILED {summary['error']}")
+            else:
+                print(
+                    f"{summary['file']}: {summary['initial_crossings']} -> {summary['final_crossings']} "
+                    f"crossings in {summary['seconds']}s ({summary['moves_per_sec']} moves/s)"
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    summary_path = args.summary or os.path.join(args.out, "summary.json")
+    with open(summary_path, "w") as f:
+        json.dump(summaries, f, indent=2)
+    print(f"Summary written to {summary_path}")
+    return 1 if any("error" in s for s in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
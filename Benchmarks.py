@@ -0,0 +1,257 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from Flip_Transpose import HamiltonianSTL
+from GA3 import HamiltonianZoningWithEdges
+from Search import make_strategy
+
+# Times the hot paths on fixed-seed zigzag grids and records the best wall
+# time and the tracemalloc peak of each benchmark. Results are keyed
+# "name/WxH" so two runs can be compared key by key.
+
+SIZES = (10, 100, 500, 1000, 2000)
+
+# Subgrid operators and the window (w, h) each one takes.
+OPERATORS = (
+    ("transpose_subgrid", 3, 3),
+    ("transpose_subgrid_wa", 3, 3),
+    ("transpose_subgrid_rl", 3, 3),
+    ("transpose_subgrid_sr", 3, 3),
+    ("transpose_subgrid_wb", 3, 3),
+    ("transpose_subgrid_ea", 3, 3),
+    ("transpose_subgrid_sl", 3, 3),
+    ("transpose_subgrid_nr", 3, 3),
+    ("transpose_subgrid_eb", 3, 3),
+    ("flip_subgrid", 3, 2),
+    ("flip_subgrid_w_3x3", 3, 3),
+    ("flip_subgrid_e_3x3", 3, 3),
+    ("flip_subgrid_n_2x3", 2, 3),
+    ("flip_subgrid_s_2x3", 2, 3),
+)
+
+EDGE_OPS = 20000
+OPERATOR_CALLS = 2000
+MUTATIONS = 2000
+EXACT_WIDTH = 6
+
+
+# Each bench_* function sets up a grid of the given size and returns
+# (run, ops): a callable doing the timed work and the number of operations
+# one call performs. Setup is not timed.
+def bench_zigzag(size, rng):
+    grid = HamiltonianSTL(size, size, use_zigzag=False)
+    return grid.zigzag, 1
+
+
+def _random_pairs(size, rng, count):
+    xs = rng.integers(0, size - 1, count).tolist()
+    ys = rng.integers(0, size, count).tolist()
+    vertical = rng.integers(0, 2, count).tolist()
+    return [
+        ((y, x), (y, x + 1)) if v else ((x, y), (x + 1, y))
+        for x, y, v in zip(xs, ys, vertical)
+    ]
+
+
+def bench_set_edge(size, rng):
+    grid = HamiltonianSTL(size, size)
+    pairs = _random_pairs(size, rng, EDGE_OPS // 2)
+
+    def run():
+        # Writes each edge to the opposite value and back.
+        for p1, p2 in pairs:
+            value = grid.has_edge(p1, p2)
+            grid.set_edge(p1, p2, not value)
+            grid.set_edge(p1, p2, value)
+    return run, 2 * len(pairs)
+
+
+def bench_has_edge(size, rng):
+    grid = HamiltonianSTL(size, size)
+    pairs = _random_pairs(size, rng, EDGE_OPS)
+
+    def run():
+        for p1, p2 in pairs:
+            grid.has_edge(p1, p2)
+    return run, len(pairs)
+
+
+def _bench_operator(method, w, h):
+    def bench(size, rng):
+        grid = HamiltonianSTL(size, size)
+        operator = getattr(grid, method)
+        xs = rng.integers(0, size - w + 1, OPERATOR_CALLS).tolist()
+        ys = rng.integers(0, size - h + 1, OPERATOR_CALLS).tolist()
+        subgrids = [grid.get_subgrid_by_corners((x, y), (x + w - 1, y + h - 1)) for x, y in zip(xs, ys)]
+
+        def run():
+            for subgrid in subgrids:
+                operator(subgrid)
+        return run, len(subgrids)
+    return bench
+
+
+def bench_validate_full_path(size, rng):
+    return HamiltonianSTL(size, size).validate_full_path, 1
+
+
+def bench_compute_fitness(size, rng):
+    return HamiltonianZoningWithEdges(HamiltonianSTL(size, size)).compute_fitness, 1
+
+
+def bench_generate_path_from_edges(size, rng):
+    return HamiltonianZoningWithEdges(HamiltonianSTL(size, size)).generate_path_from_edges, 1
+
+
+def bench_mutate(size, rng):
+    zoning = HamiltonianZoningWithEdges(HamiltonianSTL(size, size))
+
+    def run():
+        for _ in range(MUTATIONS):
+            zoning.mutate()
+    return run, MUTATIONS
+
+
+def bench_evolve(size, rng):
+    # Includes the path splice after each accepted move.
+    zoning = HamiltonianZoningWithEdges(HamiltonianSTL(size, size))
+    return lambda: zoning.evolve(MUTATIONS), MUTATIONS
+
+
+def _bench_strategy(name):
+    def bench(size, rng):
+        zoning = HamiltonianZoningWithEdges(HamiltonianSTL(size, size))
+        strategy = make_strategy(name, seed=0)
+        return lambda: zoning.evolve(MUTATIONS, strategy=strategy), MUTATIONS
+    return bench
+
+
+def bench_solve_exact(size, rng):
+    # Exact DP on a strip EXACT_WIDTH cells wide and `size` tall.
+    width = min(size, EXACT_WIDTH)
+    zoning = HamiltonianZoningWithEdges(HamiltonianSTL(width, size))
+    return zoning.solve_exact, 1
+
+
+BENCHMARKS = {
+    "zigzag": bench_zigzag,
+    "set_edge": bench_set_edge,
+    "has_edge": bench_has_edge,
+    **{method: _bench_operator(method, w, h) for method, w, h in OPERATORS},
+    "validate_full_path": bench_validate_full_path,
+    "compute_fitness": bench_compute_fitness,
+    "generate_path_from_edges": bench_generate_path_from_edges,
+    "mutate": bench_mutate,
+    "evolve": bench_evolve,
+    "evolve_anneal": _bench_strategy("anneal"),
+    "evolve_tabu": _bench_strategy("tabu"),
+    "solve_exact": bench_solve_exact,
+}
+
+
+def measure(bench, size, seed, repeat):
+    # Best of `repeat` timed runs (fewer once a run takes over a second),
+    # then one extra run under tracemalloc for the peak. Every benchmark
+    # starts from the same seeds.
+    random.seed(seed)
+    run, ops = bench(size, np.random.default_rng(seed))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        if times[-1] > 1.0:
+            break
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(times)
+    return {
+        "seconds": seconds,
+        "ops": ops,
+        "ops_per_sec": ops / seconds if seconds > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def run_benchmarks(names, sizes, seed=0, repeat=3, report=print):
+    results = {}
+    for size in sizes:
+        for name in names:
+            key = f"{name}/{size}x{size}"
+            results[key] = measure(BENCHMARKS[name], size, seed, repeat)
+            if report:
+                r = results[key]
+                report(f"{key:<40} {r['seconds'] * 1e3:10.3f} ms  {r['ops_per_sec']:14.1f} ops/s  "
+                       f"{r['peak_bytes'] / 1024:10.1f} KiB")
+    return results
+
+
+def compare(results, baseline, threshold=0.25, min_bytes=65536):
+    # Keys whose time grew by more than `threshold` (as a fraction), or whose
+    # peak memory grew by that fraction and at least `min_bytes`.
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if old["seconds"] > 0 and new["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append((key, "time", old["seconds"], new["seconds"]))
+        grown = new["peak_bytes"] - old["peak_bytes"]
+        if grown > min_bytes and new["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append((key, "memory", old["peak_bytes"], new["peak_bytes"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the grid, move and evolve hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="square grid sizes (default: %(default)s)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=None,
+                        help="run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json", help="results JSON path")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown or memory growth as a fraction (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    results = run_benchmarks(names, args.sizes, seed=args.seed, repeat=args.repeat)
+    with open(args.out, "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for key, kind, old, new in regressions:
+        print(f"REGRESSION {key} {kind}: {old:.6g} -> {new:.6g} ({new / old:.2f}x)")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+# Print-time aware scoring for HamiltonianZoningWithEdges.set_cost_model().
+#
+#   cost = crossing * zone crossings + turn * 90° turns + segment * overhead
+#
+# A straight run is a maximal line of set edges along one row (H edges) or
+# column (V edges). The head stops at every turn, so a run of d mm takes
+# d / speed plus an overhead for speeding up and slowing down: speed /
+# acceleration once the run is long enough to reach full speed, less for
+# shorter runs. The d / speed parts add up to the path length, the same for
+# every Hamiltonian path, so only the overheads (in seconds) are scored. They
+# stop growing at `saturation` edges, which keeps the term local: a move only
+# needs the runs within that many cells of its window.
+
+
+class CostModel:
+    # The default weights score crossings alone. Any turn or segment weight
+    # also makes most plateau moves worse, so greedy evolve() stalls early;
+    # use a SimulatedAnnealing strategy with them.
+    def __init__(self, crossing=1.0, turn=0.0, segment=0.0, cell_size=1.0, speed=50.0,
+                 acceleration=1000.0):
+        if min(crossing, turn, segment) < 0:
+            raise ValueError("Cost weights must not be negative")
+        if min(cell_size, speed, acceleration) <= 0:
+            raise ValueError("cell_size, speed and acceleration must be positive")
+        self.crossing = crossing
+        self.turn = turn
+        self.segment = segment
+        self.cell_size = cell_size
+        self.speed = speed
+        self.acceleration = acceleration
+        self.saturation = max(1, math.ceil(speed * speed / acceleration / cell_size))
+        self._overheads = np.array([self._overhead(n) for n in range(self.saturation + 1)])
+
+    def _overhead(self, edges):
+        distance = edges * self.cell_size
+        if distance == 0:
+            return 0.0
+        if distance >= self.speed * self.speed / self.acceleration:
+            return self.speed / self.acceleration
+        return 2 * math.sqrt(distance / self.acceleration) - distance / self.speed
+
+    def cost(self, crossings, H, V):
+        total = self.crossing * crossings
+        if self.turn:
+            total += self.turn * np.count_nonzero(turn_cells(H, V))
+        if self.segment:
+            total += self.segment * self.overhead(H, V)
+        return float(total)
+
+    def overhead(self, H, V):
+        lengths = np.concatenate((run_lengths(H), run_lengths(V.T)))
+        return float(self._overheads[np.minimum(lengths, self.saturation)].sum())
+
+    def print_time(self, H, V):
+        # Seconds to print the edges: travel at full speed plus the run
+        # overheads.
+        travel = (np.count_nonzero(H) + np.count_nonzero(V)) * self.cell_size / self.speed
+        return float(travel + self.overhead(H, V))
+
+    def window_overhead(self, H, V, x, y, w, h):
+        # Overheads of the runs that contain or end next to an edge inside
+        # the w x h window at (x, y), longer runs counted at the cap.
+        total = 0.0
+        for row in range(y, y + h):
+            total += self._line_overhead(H[row], x, x + w - 1)
+        for col in range(x, x + w):
+            total += self._line_overhead(V[:, col], y, y + h - 1)
+        return total
+
+    def _line_overhead(self, edges, lo, hi):
+        # A run that reaches past the slice is at least `saturation` long
+        # inside it, so cutting it off does not change its overhead.
+        start = max(0, lo - self.saturation)
+        line = edges[start:hi + self.saturation].tolist()
+        lo, hi = lo - start, hi - start
+        total = 0.0
+        i, n = 0, len(line)
+        while i < n:
+            if not line[i]:
+                i += 1
+                continue
+            j = i
+            while j < n and line[j]:
+                j += 1
+            if j >= lo and i <= hi:
+                total += self._overheads[min(j - i, self.saturation)]
+            i = j
+        return total
+
+
+def run_lengths(edges):
+    # Lengths, in edges, of the maximal runs of set edges along each row.
+    padded = np.zeros((edges.shape[0], edges.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = edges
+    steps = np.diff(padded, axis=1)
+    return np.flatnonzero(steps == -1) - np.flatnonzero(steps == 1)
+
+
+def turn_cells(H, V, x0=0, y0=0, x1=None, y1=None):
+    # Bool map of the cells in [x0, x1) x [y0, y1) that have both a
+    # horizontal and a vertical edge, i.e. where the path turns.
+    height, width = V.shape[0] + 1, H.shape[1] + 1
+    x1 = width if x1 is None else x1
+    y1 = height if y1 is None else y1
+    horizontal = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    vertical = np.zeros_like(horizontal)
+    # Edge left of cell x is H[:, x - 1], right of it H[:, x]; likewise V.
+    lo = max(x0, 1)
+    horizontal[:, lo - x0:] |= H[y0:y1, lo - 1:x1 - 1]
+    hi = min(x1, width - 1)
+    horizontal[:, :hi - x0] |= H[y0:y1, x0:hi]
+    lo = max(y0, 1)
+    vertical[lo - y0:, :] |= V[lo - 1:y1 - 1, x0:x1]
+    hi = min(y1, height - 1)
+    vertical[:hi - y0, :] |= V[y0:hi, x0:x1]
+    return horizontal & vertical
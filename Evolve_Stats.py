@@ -0,0 +1,87 @@
+import json
+import time
+
+# Counters and timers for mutate()/evolve(). A zoning only pays for them
+# when zoning.stats is set; see HamiltonianZoningWithEdges.instrument.
+
+OUTCOMES = ("attempts", "inapplicable", "rejected_worse", "accepted", "improved")
+
+# Where mutate() spends its time. "journal" is begin/commit/rollback, the
+# undo log that replaced copying the grid for every candidate; it includes
+# the move-index refresh commit() does.
+PHASES = ("move", "fitness", "journal")
+
+
+class EvolveStats:
+    def __init__(self, callback=None, every=1000):
+        # callback(event) runs every `every` generations of evolve() and once
+        # when it returns; event is the dict progress() builds.
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.callback = callback
+        self.every = every
+        self.operators = {}
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.idle = 0
+        self.generations = 0
+        self.fitness = None
+        self.best_fitness = None
+        self._started = None
+
+    def operator(self, name):
+        counts = self.operators.get(name)
+        if counts is None:
+            counts = self.operators[name] = dict.fromkeys(OUTCOMES, 0)
+        return counts
+
+    def start(self, fitness):
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.fitness = fitness
+        if self.best_fitness is None or fitness < self.best_fitness:
+            self.best_fitness = fitness
+
+    def generation(self, fitness):
+        self.generations += 1
+        self.fitness = fitness
+        if fitness < self.best_fitness:
+            self.best_fitness = fitness
+        if self.callback is not None and self.generations % self.every == 0:
+            self.callback(self.progress())
+
+    def finish(self):
+        if self.callback is not None:
+            self.callback(self.progress(final=True))
+
+    def elapsed(self):
+        return 0.0 if self._started is None else time.perf_counter() - self._started
+
+    def progress(self, final=False):
+        elapsed = self.elapsed()
+        return {
+            "generation": self.generations,
+            "fitness": self.fitness,
+            "best_fitness": self.best_fitness,
+            "elapsed": elapsed,
+            "generations_per_sec": self.generations / elapsed if elapsed > 0 else None,
+            "final": final,
+        }
+
+    def summary(self):
+        totals = dict.fromkeys(OUTCOMES, 0)
+        for counts in self.operators.values():
+            for outcome, n in counts.items():
+                totals[outcome] += n
+        summary = self.progress()
+        del summary["final"]
+        summary.update(
+            idle=self.idle,
+            totals=totals,
+            operators={name: dict(counts) for name, counts in sorted(self.operators.items())},
+            seconds=dict(self.seconds),
+        )
+        return summary
+
+    def to_json(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
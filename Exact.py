@@ -0,0 +1,234 @@
+import numpy as np
+
+# Exact minimum-cost Hamiltonian paths for narrow grids.
+#
+# Frontier (plug) dynamic programming over the cells in row-major order.
+# Before cell (x, y) the frontier holds one plug per column: slot x is the
+# edge coming in from the left, slot x + 1 the edge coming down from above,
+# the other slots the edges hanging down from the row above or the current
+# row. Each plug is 2 bits: 0 none, 1 and 2 the two ends of a path piece
+# (matched like brackets, since pieces never cross), 3 the end of a piece
+# whose other end is one of the path's two endpoints. Two more bits count
+# the endpoints placed so far, so a state is one int and the work per row
+# grows with the number of states, about 20 000 at width 10 and ten times
+# that at width 12.
+#
+# Transitions depend only on the states and the cell's place in the grid.
+# Each cell's transitions are built once into index arrays, and every row
+# after the first few reaches the same states, so the rest of the grid is a
+# few vectorized steps per cell with the costs read from the zone map.
+
+MAX_WIDTH = 10
+
+NONE, OPEN, CLOSE, SINGLE = 0, 1, 2, 3
+
+
+def solve(zone_map, turn=0.0, crossing=1.0, max_width=MAX_WIDTH):
+    # Returns (H, V, cost) of a path covering every cell with the least
+    # crossing * crossings + turn * turns. Grids narrower in the other
+    # direction are solved transposed.
+    zone_map = np.asarray(zone_map)
+    height, width = zone_map.shape
+    if width > max_width:
+        if height > max_width:
+            raise ValueError(f"Exact solver needs one side of at most {max_width} cells, got {width}x{height}")
+        V, H, cost = solve(zone_map.T, turn, crossing, max_width)
+        return H.T.copy(), V.T.copy(), cost
+    cross_h = (zone_map[:, :-1] != zone_map[:, 1:]) * crossing
+    cross_v = (zone_map[:-1, :] != zone_map[1:, :]) * crossing
+    H = np.zeros((height, width - 1), dtype=bool)
+    V = np.zeros((height - 1, width), dtype=bool)
+    if width * height == 1:
+        return H, V, 0
+
+    solver = _FrontierDP(width, height)
+    states = np.zeros(1, dtype=np.int64)
+    costs = np.zeros(1)
+    # Only the costs at the start of each row are kept; backtracking redoes
+    # one row at a time to recover its choices, so memory grows with the
+    # rows rather than the cells.
+    checkpoints = []
+    for y in range(height):
+        checkpoints.append((states, costs))
+        states, costs, _ = _row(solver, states, costs, y, cross_h, cross_v, turn)
+
+    done = np.flatnonzero(states == solver.done)
+    if not len(done):
+        raise ValueError("No Hamiltonian path exists")
+    index = done[0]
+    cost = costs[index]
+    for y in range(height - 1, -1, -1):
+        states, costs = checkpoints.pop()
+        _, _, back = _row(solver, states, costs, y, cross_h, cross_v, turn)
+        for x in range(width - 1, -1, -1):
+            step, chosen = back[x]
+            t = chosen[index]
+            if step.right[t]:
+                H[y, x] = True
+            if step.down[t]:
+                V[y, x] = True
+            index = step.src[t]
+    return H, V, float(cost)
+
+
+def _row(solver, states, costs, y, cross_h, cross_v, turn):
+    # Runs the DP across row y. Returns the states and costs after it, and
+    # per cell the step and the transition chosen for each new state.
+    height, width = solver.height, solver.width
+    back = []
+    for x in range(width):
+        step = solver.step(states, x, y)
+        total = costs[step.src] + step.turn * turn
+        if x < width - 1:
+            total += step.right * cross_h[y, x]
+        if y < height - 1:
+            total += step.down * cross_v[y, x]
+        costs = np.full(len(step.states), np.inf)
+        np.minimum.at(costs, step.dst, total)
+        best = total == costs[step.dst]
+        chosen = np.empty(len(costs), dtype=np.int32)
+        chosen[step.dst[best]] = np.flatnonzero(best)
+        back.append((step, chosen))
+        states = step.states
+    return states, costs, back
+
+
+class _Step:
+    # The transitions out of one set of frontier states at one cell, as
+    # arrays: src and dst index the source and destination state arrays.
+    def __init__(self, states, src, dst, right, down, turn):
+        self.states = states
+        self.src = src
+        self.dst = dst
+        self.right = right
+        self.down = down
+        self.turn = turn
+
+
+class _FrontierDP:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.plug_mask = (1 << 2 * (width + 1)) - 1
+        self.ends_shift = 2 * (width + 1)
+        # Marks the state after the last cell closed the path.
+        self.done = 3 << self.ends_shift
+        self._row_cache = {}
+        self._steps = {}
+
+    def step(self, states, x, y):
+        # Every interior row reaches the same states, so after the first few
+        # rows each cell's _Step comes straight from the cache.
+        last_row = y == self.height - 1
+        key = (x, y > 0, last_row, states.tobytes())
+        step = self._steps.get(key)
+        if step is None:
+            step = self._steps[key] = self._build_step(states, x, y)
+        return step
+
+    def _build_step(self, states, x, y):
+        index = {}
+        src, dst, right, down, turn = [], [], [], [], []
+        for i, state in enumerate(states.tolist()):
+            if x == 0 and y:
+                state = self.next_row(state)
+            for new, r, d, t in self.transitions(state, x, y):
+                src.append(i)
+                dst.append(index.setdefault(new, len(index)))
+                right.append(r)
+                down.append(d)
+                turn.append(t)
+        return _Step(
+            np.fromiter(index, dtype=np.int64, count=len(index)),
+            np.array(src, dtype=np.int32), np.array(dst, dtype=np.int32),
+            np.array(right, dtype=bool), np.array(down, dtype=bool), np.array(turn, dtype=bool),
+        )
+
+    def next_row(self, state):
+        # After the last cell of a row the right plug is empty; every plug
+        # moves one slot right so slot 0 is the new row's empty left plug.
+        shifted = self._row_cache.get(state)
+        if shifted is None:
+            ends = state >> self.ends_shift
+            shifted = ((state & self.plug_mask) << 2) & self.plug_mask | ends << self.ends_shift
+            self._row_cache[state] = shifted
+        return shifted
+
+    def transitions(self, state, x, y):
+        # (new state, right edge, down edge, turn) for each way cell (x, y)
+        # can continue the frontier.
+        last_col = x == self.width - 1
+        last_row = y == self.height - 1
+        last_cell = last_col and last_row
+        ends = state >> self.ends_shift
+        plugs = state & self.plug_mask
+        left = (plugs >> 2 * x) & 3
+        up = (plugs >> 2 * (x + 1)) & 3
+        rest = plugs & ~(15 << 2 * x)
+        can_right, can_down = not last_col, not last_row
+        out = []
+
+        def add(p, e, down_plug, right_plug):
+            # down_plug goes in slot x, right_plug in slot x + 1.
+            new = p | down_plug << 2 * x | right_plug << 2 * (x + 1) | e << self.ends_shift
+            horizontal = left or right_plug
+            vertical = up or down_plug
+            out.append((new, bool(right_plug), bool(down_plug), bool(horizontal and vertical)))
+
+        def finish(p):
+            # The path is whole; only valid as the last cell with no other
+            # pieces open.
+            if last_cell and p == 0:
+                out.append((self.done, False, False, bool(left and up)))
+
+        if not left and not up:
+            if can_right and can_down:
+                add(rest, ends, OPEN, CLOSE)
+            if ends < 2:
+                if can_down:
+                    add(rest, ends + 1, SINGLE, 0)
+                if can_right:
+                    add(rest, ends + 1, 0, SINGLE)
+        elif not left or not up:
+            plug = left or up
+            if can_down:
+                add(rest, ends, plug, 0)
+            if can_right:
+                add(rest, ends, 0, plug)
+            if ends < 2:
+                # The path ends here.
+                if plug == SINGLE:
+                    finish(rest)
+                else:
+                    add(self._set_partner(rest, x if left else x + 1, plug, SINGLE), ends + 1, 0, 0)
+        else:
+            # Both plugs meet here.
+            if left == SINGLE and up == SINGLE:
+                finish(rest)
+            elif left == SINGLE or up == SINGLE:
+                other, slot = (up, x + 1) if left == SINGLE else (left, x)
+                add(self._set_partner(rest, slot, other, SINGLE), ends, 0, 0)
+            elif left == OPEN and up == OPEN:
+                add(self._set_partner(rest, x + 1, OPEN, OPEN), ends, 0, 0)
+            elif left == CLOSE and up == CLOSE:
+                add(self._set_partner(rest, x, CLOSE, CLOSE), ends, 0, 0)
+            elif left == CLOSE and up == OPEN:
+                add(rest, ends, 0, 0)
+            # OPEN then CLOSE would close a loop.
+        return out
+
+    def _set_partner(self, plugs, slot, label, value):
+        # Relabels the plug matching the bracket `label` at `slot`.
+        step = 1 if label == OPEN else -1
+        depth = 0
+        i = slot + step
+        while 0 <= i <= self.width:
+            mark = (plugs >> 2 * i) & 3
+            if mark == label:
+                depth += 1
+            elif mark == OPEN + CLOSE - label:
+                if depth == 0:
+                    return plugs & ~(3 << 2 * i) | value << 2 * i
+                depth -= 1
+            i += step
+        raise RuntimeError("Unmatched plug in frontier state")
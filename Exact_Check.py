@@ -0,0 +1,104 @@
+import argparse
+import sys
+
+import numpy as np
+
+from Exact import solve
+from Flip_Transpose import HamiltonianSTL
+
+# Self-check for the Exact frontier DP: solves small random zone maps and
+# compares the cost with a brute-force search over every Hamiltonian path.
+# The returned edges must also form one path whose recounted cost matches.
+#
+#   python Exact_Check.py --cases 100 --seed 1
+#
+# Brute force grows fast: the default of up to 16 cells (4x4, 5x3, 8x2, ...)
+# takes a few seconds, 20 cells about half a minute.
+
+
+def path_cost(zone_map, order, turn):
+    # crossings + turn * turns along an order of cell ids.
+    zones = zone_map.reshape(-1)
+    crossings = sum(zones[a] != zones[b] for a, b in zip(order, order[1:]))
+    turns = sum(b - a != c - b for a, b, c in zip(order, order[1:], order[2:]))
+    return crossings + turn * turns
+
+
+def brute_force(zone_map, turn=0.0):
+    # Least path_cost over every Hamiltonian path of the grid, by DFS from
+    # every cell. Each path is found from both ends, which costs time, not
+    # correctness.
+    height, width = zone_map.shape
+    cells = width * height
+    neighbours = [
+        [j for j in (i - 1, i + 1, i - width, i + width)
+         if 0 <= j < cells and (abs(j - i) == width or j // width == i // width)]
+        for i in range(cells)
+    ]
+    best = None
+    stack = [[start] for start in range(cells)]
+    while stack:
+        order = stack.pop()
+        if len(order) == cells:
+            cost = path_cost(zone_map, order, turn)
+            if best is None or cost < best:
+                best = cost
+            continue
+        for j in neighbours[order[-1]]:
+            if j not in order:
+                stack.append(order + [j])
+    return best
+
+
+def check(zone_map, turn=0.0):
+    # None when the solver agrees with brute force, else what went wrong.
+    zone_map = np.asarray(zone_map)
+    height, width = zone_map.shape
+    H, V, cost = solve(zone_map, turn=turn)
+    grid = HamiltonianSTL(width, height, use_zigzag=False)
+    grid.H[:] = H
+    grid.V[:] = V
+    if width * height == 1:
+        order = [0]
+    else:
+        try:
+            order = grid.path_order().tolist()
+        except ValueError as err:
+            return f"edges are not one path: {err}"
+    recounted = path_cost(zone_map, order, turn)
+    if abs(recounted - cost) > 1e-9:
+        return f"reported cost {cost} but the edges cost {recounted}"
+    expected = brute_force(zone_map, turn)
+    if abs(expected - cost) > 1e-9:
+        return f"cost {cost}, brute force found {expected}"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the exact solver with brute force on small grids.")
+    parser.add_argument("--cases", type=int, default=72, help="random grids to check (default: 72)")
+    parser.add_argument("--max-cells", type=int, default=16, help="largest grid, in cells (default: 16)")
+    parser.add_argument("--zones", type=int, default=3, help="zones per map (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    shapes = [(w, h) for w in range(1, args.max_cells + 1) for h in range(1, args.max_cells + 1)
+              if w * h <= args.max_cells]
+    failures = 0
+    for case in range(args.cases):
+        width, height = shapes[rng.integers(len(shapes))]
+        zone_map = rng.integers(0, args.zones, (height, width))
+        # Every other case adds turn weights, so both cost terms are covered.
+        turn = 0.0 if case % 2 == 0 else float(rng.choice([0.3, 1.5]))
+        problem = check(zone_map, turn)
+        if problem is not None:
+            failures += 1
+            print(f"FAIL {width}x{height} turn={turn}: {problem}")
+            print(zone_map)
+    print(f"{args.cases - failures}/{args.cases} grids agree with brute force")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
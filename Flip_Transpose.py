@@ -1,25 +1,36 @@
+import random
+
+import numpy as np
+
+from Move_Table import move_lookup, move_table, window_bits
+
+
 class HamiltonianSTL:
     def __init__(self, width: int, height: int, use_zigzag=True):
         self.width = width
         self.height = height
-        self.H = [[False for _ in range(width - 1)] for _ in range(height)]
-        self.V = [[False for _ in range(width)] for _ in range(height - 1)]
+        # One byte per edge. H[y][x] still works, but H[y, x] skips the row
+        # view and H.copy() replaces the old [row[:] for row in H] copy.
+        self.H = np.zeros((height, width - 1), dtype=bool)
+        self.V = np.zeros((height - 1, width), dtype=bool)
+        # Undo journal of (array, y, x, old value); None outside a transaction.
+        self._journal = None
+        # Applicable-move index, see build_move_index.
+        self._index_names = ()
+        self._index_list = []
+        self._index_pos = {}
+        # When set, apply_move re-reads the window from H and V after writing
+        # and undoes the move unless window_state() is unchanged.
+        self.check_moves = False
 
         if use_zigzag:
             self.zigzag()
 
     def zigzag(self):
-        for y in range(self.height):
-            if y % 2 == 0:
-                for x in range(self.width - 1):
-                    self.H[y][x] = True
-                if y < self.height - 1:
-                    self.V[y][self.width - 1] = True
-            else:
-                for x in range(self.width - 1):
-                    self.H[y][x] = True
-                if y < self.height - 1:
-                    self.V[y][0] = True
+        self.H[:] = True
+        self.V[:] = False
+        self.V[0::2, self.width - 1] = True
+        self.V[1::2, 0] = True
 
     def set_edge(self, p1, p2, value=True):
         if not p1 or not p2:
@@ -27,9 +38,19 @@ class HamiltonianSTL:
         x1, y1 = p1
         x2, y2 = p2
         if x1 == x2 and abs(y1 - y2) == 1:
-            self.V[min(y1, y2)][x1] = value
+            self._write(self.V, min(y1, y2), x1, value)
         elif y1 == y2 and abs(x1 - x2) == 1:
-            self.H[y1][min(x1, x2)] = value
+            self._write(self.H, y1, min(x1, x2), value)
+
+    def _write(self, edges, y, x, value):
+        if self._journal is not None:
+            self._journal.append((edges, y, x, edges[y, x]))
+            edges[y, x] = value
+            return
+        edges[y, x] = value
+        if self._index_names:
+            x1, y1 = (x, y + 1) if edges is self.V else (x + 1, y)
+            self._refresh_index(x, y, x1, y1)
 
     def has_edge(self, p1, p2):
         if not p1 or not p2:
@@ -37,11 +58,65 @@ class HamiltonianSTL:
         x1, y1 = p1
         x2, y2 = p2
         if x1 == x2 and abs(y1 - y2) == 1:
-            return self.V[min(y1, y2)][x1]
+            return bool(self.V[min(y1, y2), x1])
         elif y1 == y2 and abs(x1 - x2) == 1:
-            return self.H[y1][min(x1, x2)]
+            return bool(self.H[y1, min(x1, x2)])
         return False
 
+    # Transactions: set_edge writes between begin() and commit()/rollback()
+    # are journaled so a rejected move is undone in O(edges touched).
+    def begin(self):
+        if self._journal is not None:
+            raise RuntimeError("A transaction is already open")
+        self._journal = []
+
+    def commit(self):
+        journal = self._journal
+        self._journal = None
+        if journal and self._index_names:
+            cells = [(x, y) for _, y, x, _ in journal]
+            cells += [(x + 1, y) if edges is self.H else (x, y + 1) for edges, y, x, _ in journal]
+            xs, ys = zip(*cells)
+            self._refresh_index(min(xs), min(ys), max(xs), max(ys))
+
+    def rollback(self):
+        journal = self._journal
+        self._journal = None
+        if journal:
+            for edges, y, x, old in reversed(journal):
+                edges[y, x] = old
+
+    def committed_edges(self):
+        # Copies of H and V without the writes of an open transaction.
+        H, V = self.H.copy(), self.V.copy()
+        for edges, y, x, old in reversed(self._journal or ()):
+            (H if edges is self.H else V)[y, x] = old
+        return H, V
+
+    # Bulk accessors. These return views, so writes go straight to the grid.
+    def h_row(self, y):
+        return self.H[y]
+
+    def v_row(self, y):
+        return self.V[y]
+
+    def window_edges(self, x, y, w, h):
+        return self.H[y:y + h, x:x + w - 1], self.V[y:y + h - 1, x:x + w]
+
+    # Bit-packed form, about 1/8 of the in-memory size.
+    def pack(self):
+        return np.packbits(self.H, axis=None).tobytes() + np.packbits(self.V, axis=None).tobytes()
+
+    @classmethod
+    def unpack(cls, width, height, data):
+        grid = cls(width, height, use_zigzag=False)
+        h_count = grid.H.size
+        h_bytes = (h_count + 7) // 8
+        bits = np.frombuffer(data, dtype=np.uint8)
+        grid.H[:] = np.unpackbits(bits[:h_bytes], count=h_count).reshape(grid.H.shape).astype(bool)
+        grid.V[:] = np.unpackbits(bits[h_bytes:], count=grid.V.size).reshape(grid.V.shape).astype(bool)
+        return grid
+
     def get_subgrid_by_corners(self, corner1, corner2):
         x1, y1 = corner1
         x2, y2 = corner2
@@ -59,42 +134,173 @@ class HamiltonianSTL:
             subgrid.append(row)
         return subgrid
 
+    # Move engine. A move reads the window's internal edges as a mask, looks
+    # the mask up in Move_Table and writes back only the bits that differ.
+    def window_mask(self, x, y, w, h):
+        H, V = self.H, self.V
+        mask = 0
+        for bit, (vertical, dx, dy) in enumerate(window_bits(w, h)):
+            if (V if vertical else H)[y + dy, x + dx]:
+                mask |= 1 << bit
+        return mask
+
+    def move_target(self, name, x, y):
+        w, h, table = move_table(name)
+        if x < 0 or y < 0 or x + w > self.width or y + h > self.height:
+            return None
+        return table.get(self.window_mask(x, y, w, h))
+
+    def can_apply(self, name, x, y):
+        return self.move_target(name, x, y) is not None
+
+    def apply_move(self, name, x, y):
+        w, h, table = move_table(name)
+        if x < 0 or y < 0 or x + w > self.width or y + h > self.height:
+            return False
+        mask = self.window_mask(x, y, w, h)
+        target = table.get(mask)
+        if target is None:
+            return False
+        before = self.window_state(x, y, w, h) if self.check_moves else None
+        self._write_mask(x, y, w, h, mask, target)
+        if self.check_moves and not self.window_still_valid(x, y, w, h, before):
+            self._write_mask(x, y, w, h, self.window_mask(x, y, w, h), mask)
+            return False
+        return True
+
+    def _write_mask(self, x, y, w, h, mask, target):
+        changed = mask ^ target
+        for bit, (vertical, dx, dy) in enumerate(window_bits(w, h)):
+            if changed >> bit & 1:
+                self._write(self.V if vertical else self.H, y + dy, x + dx, bool(target >> bit & 1))
+
+    def window_state(self, x, y, w, h):
+        # Read from H and V, independently of the move tables: the degree of
+        # each window cell, counting edges that leave the window, and the
+        # endpoint pairs of the path pieces inside it. None if a cell has
+        # more than two edges or the window holds a cycle.
+        H, V = self.H, self.V
+        degrees = []
+        inside = []
+        for cy in range(y, y + h):
+            for cx in range(x, x + w):
+                links = []
+                degree = 0
+                for vertical, ex, ey, nx, ny in (
+                    (False, cx - 1, cy, cx - 1, cy), (False, cx, cy, cx + 1, cy),
+                    (True, cx, cy - 1, cx, cy - 1), (True, cx, cy, cx, cy + 1),
+                ):
+                    if not (0 <= nx < self.width and 0 <= ny < self.height):
+                        continue
+                    if (V if vertical else H)[ey, ex]:
+                        degree += 1
+                        if x <= nx < x + w and y <= ny < y + h:
+                            links.append((ny - y) * w + nx - x)
+                if degree > 2:
+                    return None
+                degrees.append(degree)
+                inside.append(links)
+
+        seen = [False] * (w * h)
+        ends = []
+        for start in range(w * h):
+            if len(inside[start]) < 2 and not seen[start]:
+                seen[start] = True
+                prev, cur = -1, start
+                while True:
+                    nxt = [c for c in inside[cur] if c != prev]
+                    if not nxt:
+                        break
+                    prev, cur = cur, nxt[0]
+                    seen[cur] = True
+                ends.append((min(start, cur), max(start, cur)))
+        if not all(seen):
+            return None
+        return tuple(degrees), tuple(sorted(ends))
+
+    def window_still_valid(self, x, y, w, h, before):
+        # Local re-validation against window_state() taken before the move:
+        # the same degrees and endpoint pairs mean a path that was valid
+        # before still is. O(window), not O(grid).
+        after = self.window_state(x, y, w, h)
+        return after is not None and after == before
+
+    # Index of the (name, x, y) moves that apply right now. Edge writes keep
+    # it current: immediately outside a transaction, at commit() inside one.
+    # Code that assigns H or V wholesale must call build_move_index again.
+    def build_move_index(self, names):
+        self._index_names = tuple(names)
+        self._index_list = []
+        self._index_pos = {}
+        for name in self._index_names:
+            w, h, _ = move_table(name)
+            if w > self.width or h > self.height:
+                continue
+            ys, xs = np.nonzero(move_lookup(name)[self._window_masks(w, h)] >= 0)
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                self._index_add((name, x, y))
+
+    def random_move(self, rng=random):
+        if not self._index_list:
+            return None
+        return rng.choice(self._index_list)
+
+    def applicable_moves(self):
+        return list(self._index_list)
+
+    def _window_masks(self, w, h, x0=0, y0=0, rows=None, cols=None):
+        # Masks of the w x h windows with origins in a rows x cols block at
+        # (x0, y0); the whole grid by default.
+        if rows is None:
+            rows, cols = self.height - h + 1, self.width - w + 1
+        masks = np.zeros((rows, cols), dtype=np.int64)
+        for bit, (vertical, dx, dy) in enumerate(window_bits(w, h)):
+            edges = self.V if vertical else self.H
+            masks |= edges[y0 + dy:y0 + dy + rows, x0 + dx:x0 + dx + cols].astype(np.int64) << bit
+        return masks
+
+    def _refresh_index(self, x0, y0, x1, y1):
+        # Re-check every indexed window that overlaps cells [x0, x1] x [y0, y1].
+        for name in self._index_names:
+            w, h, _ = move_table(name)
+            ox, oy = max(0, x0 - w + 1), max(0, y0 - h + 1)
+            rows = min(self.height - h, y1) - oy + 1
+            cols = min(self.width - w, x1) - ox + 1
+            if rows <= 0 or cols <= 0:
+                continue
+            valid = (move_lookup(name)[self._window_masks(w, h, ox, oy, rows, cols)] >= 0).tolist()
+            for dy, row in enumerate(valid):
+                for dx, ok in enumerate(row):
+                    key = (name, ox + dx, oy + dy)
+                    if ok:
+                        if key not in self._index_pos:
+                            self._index_add(key)
+                    elif key in self._index_pos:
+                        self._index_remove(key)
+
+    def _index_add(self, key):
+        self._index_pos[key] = len(self._index_list)
+        self._index_list.append(key)
+
+    def _index_remove(self, key):
+        pos = self._index_pos.pop(key)
+        last = self._index_list.pop()
+        if pos < len(self._index_list):
+            self._index_list[pos] = last
+            self._index_pos[last] = pos
+
+    def _subgrid_move(self, name, subgrid, applied, refused):
+        if any(pt is None for row in subgrid for pt in row):
+            return subgrid, refused
+        x, y = subgrid[0][0]
+        if self.apply_move(name, x, y):
+            return subgrid, applied
+        return subgrid, refused
+
     def transpose_subgrid(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
-
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, d)
-        self.set_edge(b, c)
-        self.set_edge(b, e)
-        self.set_edge(c, f)
-        self.set_edge(e, h)
-        self.set_edge(g, h)
-        self.set_edge(f, i)
-
-        return subgrid, "transposed"
+        return self._subgrid_move("transpose", subgrid, "transposed", "not transposable")
 
     def print_ascii_edges(self, highlight_subgrid=None):
         grid_height = self.height * 2 - 1
@@ -127,329 +333,111 @@ class HamiltonianSTL:
             print(' '.join(row))
 
     def validate_full_path(self):
-        visited = set()
-        start = (0, 0)
-        stack = [start]
-
-        while stack:
-            current = stack.pop()
-            if current in visited:
-                continue
-            visited.add(current)
-
-            x, y = current
-            neighbors = []
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.has_edge(current, (nx, ny)):
-                        neighbors.append((nx, ny))
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    stack.append(neighbor)
-
-        return len(visited) == self.width * self.height
+        # Strict: degrees at most 2, exactly cells - 1 edges and a single
+        # connected path, so edges that pass can always be walked.
+        try:
+            self.path_order()
+        except ValueError:
+            return False
+        return True
+
+    def path_order(self):
+        # Cell ids (y * width + x) in path order, walking from a degree-1
+        # endpoint in O(cells). Degrees and the edge count are checked with
+        # array operations first; ValueError says what is wrong.
+        width, height = self.width, self.height
+        total = width * height
+        H, V = self.H, self.V
+
+        # Candidate neighbours of every cell in left, right, up, down order.
+        idx = np.arange(total).reshape(height, width)
+        cand = np.full((4, height, width), -1, dtype=np.int64)
+        cand[0, :, 1:] = np.where(H, idx[:, :-1], -1)
+        cand[1, :, :-1] = np.where(H, idx[:, 1:], -1)
+        cand[2, 1:, :] = np.where(V, idx[:-1, :], -1)
+        cand[3, :-1, :] = np.where(V, idx[1:, :], -1)
+        cand = cand.reshape(4, total)
+
+        degree = (cand >= 0).sum(axis=0)
+        if degree.max(initial=0) > 2:
+            bad = int(np.argmax(degree > 2))
+            raise ValueError(f"Cell {(bad % width, bad // width)} has more than two path edges")
+        edge_count = int(degree.sum()) // 2
+        if edge_count != total - 1:
+            raise ValueError(f"Edge set has {edge_count} edges, a path over {total} cells needs {total - 1}")
+
+        # Sort each column so present neighbours come first. With the edge
+        # count right, the walk covers every cell unless there is a cycle.
+        cand = -np.sort(-cand, axis=0)
+        first = cand[0].tolist()
+        second = cand[1].tolist()
+
+        start = int(np.argmax(degree <= 1))
+        order = [start] * total
+        prev, cur = -1, start
+        visited = 1
+        while visited < total:
+            nxt = first[cur] if first[cur] != prev else second[cur]
+            if nxt < 0:
+                break
+            order[visited] = nxt
+            visited += 1
+            prev, cur = cur, nxt
+
+        if visited != total:
+            raise ValueError(
+                f"Edge set is not a single path: walk from {(start % width, start // width)} "
+                f"covers {visited} of {total} cells"
+            )
+        return np.array(order)
 
     # West-Above
     def transpose_subgrid_wa(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
-
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, d)
-        self.set_edge(d, g)
-        self.set_edge(g, h)
-        self.set_edge(h, e)
-        self.set_edge(e, b)
-        self.set_edge(b, c)
-        self.set_edge(f, i)
-
-        return subgrid, "transposed_wa"
-
+        return self._subgrid_move("transpose_wa", subgrid, "transposed_wa", "not transposable")
 
     # Right-Left
     def transpose_subgrid_rl(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("transpose_rl", subgrid, "transposed_rl", "not transposable")
 
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(g, d)
-        self.set_edge(d, a)
-        self.set_edge(g, h)
-        self.set_edge(b, e)
-        self.set_edge(e, h)
-        self.set_edge(b, c)
-        self.set_edge(i, f)
-
-        return subgrid, "transposed_rl"
-    
     # South-Right
     def transpose_subgrid_sr(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("transpose_sr", subgrid, "transposed_sr", "not transposable")
 
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, d)
-        self.set_edge(b, c)
-        self.set_edge(b, e)
-        self.set_edge(c, f)
-        self.set_edge(e, h)
-        self.set_edge(f, i)
-
-        return subgrid, "transposed_sr"
-    
     # West-Below
     def transpose_subgrid_wb(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
-
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, b)
-        self.set_edge(d, e)
-        self.set_edge(e, f)
-        self.set_edge(g, h)
-        self.set_edge(h, i)
-        self.set_edge(f, i)
-
-        return subgrid, "transposed_wb"
+        return self._subgrid_move("transpose_wb", subgrid, "transposed_wb", "not transposable")
 
     # East-Above
     def transpose_subgrid_ea(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("transpose_ea", subgrid, "transposed_ea", "not transposable")
 
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, b)
-        self.set_edge(b, c)
-        self.set_edge(a, d)
-        self.set_edge(d, e)
-        self.set_edge(e, f)
-        self.set_edge(g, h)
-
-        return subgrid, "transposed_ea"
-    
     # South-Left
     def transpose_subgrid_sl(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("transpose_sl", subgrid, "transposed_sl", "not transposable")
 
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, b)
-        self.set_edge(a, d)
-        self.set_edge(b, e)
-        self.set_edge(c, f)
-        self.set_edge(d, g)
-        self.set_edge(e, h)
-
-        return subgrid, "transposed_sl"
-    
     # North-Right
     def transpose_subgrid_nr(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("transpose_nr", subgrid, "transposed_nr", "not transposable")
 
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(b, e)
-        self.set_edge(c, f)
-        self.set_edge(d, g)
-        self.set_edge(e, h)
-        self.set_edge(f, i)
-        self.set_edge(h, i)
-
-        return subgrid, "transposed_nr"
-    
     # East-Below
     def transpose_subgrid_eb(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
-
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not transposable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        self.set_edge(a, b)
-        self.set_edge(d, e)
-        self.set_edge(e, f)
-        self.set_edge(d, g)
-        self.set_edge(g, h)
-        self.set_edge(h, i)
-
-        return subgrid, "transposed_eb"
-    
-
+        return self._subgrid_move("transpose_eb", subgrid, "transposed_eb", "not transposable")
 
     # Flip Operation
     def flip_subgrid(self, subgrid):
@@ -458,147 +446,37 @@ class HamiltonianSTL:
             return subgrid, "invalid size"
 
         if len(subgrid) == 3 and len(subgrid[0]) == 2:
-            width, height = 2, 3 
+            name = "flip_2x3"
         elif len(subgrid) == 2 and len(subgrid[0]) == 3:
-            width, height = 3, 2 
+            name = "flip_3x2"
         else:
             return subgrid, "not 3x2 or 2x3"
-
-        points = [pt for row in subgrid for pt in row if pt is not None]
-
-        for pt in points:
-            x, y = pt
-            neighbor_found = False
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if (nx, ny) in points and self.has_edge(pt, (nx, ny)):
-                    neighbor_found = True
-            if not neighbor_found:
-                return subgrid, "not flippable"
-
-        for pt in points:
-            x, y = pt
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (x + dx, y + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        if width == 2:
-            a, b = subgrid[0]
-            c, d = subgrid[1]
-            e, f = subgrid[2]
-            self.set_edge(a, b)
-            self.set_edge(a, c)
-            self.set_edge(b, d)
-            self.set_edge(e, f)
-        else:
-            a, b, c = subgrid[0]
-            d, e, f = subgrid[1]
-            self.set_edge(a, d)
-            self.set_edge(b, c)
-            self.set_edge(b, e)
-            self.set_edge(e, f)
-
-        return subgrid, "flipped"
+        return self._subgrid_move(name, subgrid, "flipped", "not flippable")
 
     # West
     def flip_subgrid_w_3x3(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
-
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        points = [a, b, c, d, e, f, g, h, i]
-        for pt in points:
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (pt[0] + dx, pt[1] + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        self.set_edge(g, h)
-        self.set_edge(a, d)
-        self.set_edge(a, b)
-        self.set_edge(e, h)
-        self.set_edge(d, e) 
-        self.set_edge(i, f)
-
-        return subgrid, "flipped"
+        return self._subgrid_move("flip_w_3x3", subgrid, "flipped", "not flippable")
 
     # East
     def flip_subgrid_e_3x3(self, subgrid):
         if len(subgrid) != 3 or len(subgrid[0]) != 3:
             return subgrid, "not 3x3"
+        return self._subgrid_move("flip_e_3x3", subgrid, "flipped", "not flippable")
 
-        a, b, c = subgrid[0]
-        d, e, f = subgrid[1]
-        g, h, i = subgrid[2]
-
-        points = [a, b, c, d, e, f, g, h, i]
-        for pt in points:
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (pt[0] + dx, pt[1] + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        self.set_edge(a, b)
-        self.set_edge(d, e) 
-        self.set_edge(g, h)
-        self.set_edge(a, d)
-        self.set_edge(e, h)
-        self.set_edge(b, c)
-        self.set_edge(f, i)
-
-        return subgrid, "flipped"
-    
     # North
     def flip_subgrid_n_2x3(self, subgrid):
-        if len(subgrid) != 2 or len(subgrid[0]) != 3:
+        if len(subgrid) != 3 or len(subgrid[0]) != 2:
             return subgrid, "not 2x3"
+        return self._subgrid_move("flip_n_2x3", subgrid, "flipped", "not flippable")
 
-        a, b = subgrid[0]
-        c, d = subgrid[1]
-        e, f = subgrid[2]
-
-
-        points = [a, b, c, d, e, f]
-        for pt in points:
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (pt[0] + dx, pt[1] + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        self.set_edge(a, c)
-        self.set_edge(b, d) 
-        self.set_edge(c, d)
-        self.set_edge(e, f)
-
-        return subgrid, "flipped"
-    
     # South
     def flip_subgrid_s_2x3(self, subgrid):
-        if len(subgrid) != 2 or len(subgrid[0]) != 3:
+        if len(subgrid) != 3 or len(subgrid[0]) != 2:
             return subgrid, "not 2x3"
+        return self._subgrid_move("flip_s_2x3", subgrid, "flipped", "not flippable")
 
-        a, b = subgrid[0]
-        c, d = subgrid[1]
-        e, f = subgrid[2]
-
-        points = [a, b, c, d, e, f]
-        for pt in points:
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                neighbor = (pt[0] + dx, pt[1] + dy)
-                if neighbor in points:
-                    self.set_edge(pt, neighbor, False)
-
-        self.set_edge(a, b)
-        self.set_edge(c, d) 
-        self.set_edge(c, e)
-        self.set_edge(d, f)
-
-        return subgrid, "flipped"
-    
 if __name__ == '__main__':
     hamiltonian = HamiltonianSTL(10, 10)
 
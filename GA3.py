@@ -1,311 +1,596 @@
-import random
-from turtle import rt
-import matplotlib.pyplot as plt
+import time
+import numpy as np
 from Flip_Transpose import HamiltonianSTL
-import tkinter as tk
-from tkinter import filedialog
-from matplotlib.widgets import Button
+from Cost_Model import CostModel, turn_cells
+from Move_Table import move_table
+from Seeds import choose_seed, edges_from_order
+from Toolpath import write_gcode
+from Layer_File import (
+    edges_from_segments, read_layer, read_text_segments, read_zone_map, write_layer, write_text_path,
+)
+
+# The optimization core. Plotting and file dialogs live in Zoning_GUI, which
+# the GUI methods below import on first use so headless callers never load
+# matplotlib or tkinter.
+
+GCODE_EXTENSIONS = (".gcode", ".gc", ".nc")
+
+# Moves mutate() samples from the grid's applicable-move index.
+MUTATION_MOVES = ('reroute_3x3', 'reroute_3x2', 'reroute_2x3')
+
 
 class HamiltonianZoningWithEdges:
-    def __init__(self, hamiltonian_stl):
+    def __init__(self, hamiltonian_stl, debug_fitness=False, zone_map=None, track_path=True,
+                 check_moves=False, cost_model=None):
         self.h = hamiltonian_stl
+        # When set, every accepted move checks the cached fitness against a
+        # full compute_fitness() recount.
+        self.debug_fitness = debug_fitness
+        # When set, every move re-validates its window from the live edges
+        # and is refused if it would break the path (HamiltonianSTL.
+        # check_moves). Table moves never should; this checks the tables.
+        self.check_moves = check_moves
+        self.h.check_moves = check_moves
+        # EvolveStats while instrumented, see instrument().
+        self.stats = None
         self.width = self.h.width
         self.height = self.h.height
-        self.zones = {
-            (x, y): 1 if x < self.width // 2 else 2
-            for y in range(self.height)
-            for x in range(self.width)
-        }
-        self.path = self.generate_path_from_edges()
+        # A Cost_Model.CostModel makes fitness the combined print cost; None
+        # scores by crossings alone. With a model, self._turns caches which
+        # cells are turns so a move rescans only its own window.
+        self.cost_model = cost_model
+        self._turns = None
+        if zone_map is None:
+            zone_map = self.default_zone_map(self.width, self.height)
+        self.set_zone_map(zone_map)
+        # The path is kept as self.order (cell ids y * width + x in print
+        # order) and self.position (cell id -> index in order). Moves splice
+        # the order in place; self.path is the [(x, y), ...] view of it.
+        # With track_path=False the edges need not form a whole path (a tile
+        # cut out of a larger grid, say) and no order is kept.
+        self.track_path = track_path
+        self._set_order(None)
+        if track_path:
+            self._rebuild_order()
+        self.h.build_move_index(MUTATION_MOVES)
+
+    @classmethod
+    def from_file(cls, file_path, zone_map=None, **kwargs):
+        # The zone map can only be checked against the loaded grid, so it
+        # goes to load_edges rather than the 1x1 placeholder.
+        zoning = cls(HamiltonianSTL(1, 1, use_zigzag=False), **kwargs)
+        zoning.load_edges(file_path, zone_map=zone_map)
+        return zoning
 
     def generate_path_from_edges(self):
-        neighbors = {pt: [] for pt in self.zones}
-        for y in range(self.height):
-            for x in range(self.width - 1):
-                if self.h.H[y][x]:
-                    a, b = (x, y), (x + 1, y)
-                    neighbors[a].append(b)
-                    neighbors[b].append(a)
-        for y in range(self.height - 1):
-            for x in range(self.width):
-                if self.h.V[y][x]:
-                    a, b = (x, y), (x, y + 1)
-                    neighbors[a].append(b)
-                    neighbors[b].append(a)
-
-        def dfs(current, visited, path):
-            if len(path) == self.width * self.height:
-                return path
-            for nxt in neighbors[current]:
-                if nxt not in visited:
-                    visited.add(nxt)
-                    result = dfs(nxt, visited, path + [nxt])
-                    if result:
-                        return result
-                    visited.remove(nxt)
-            return None
-
-        for start in neighbors:
-            result = dfs(start, {start}, [start])
-            if result:
-                return result
-        return []
+        # An empty edge set gives an empty path; anything that is not a
+        # single path covering every cell raises ValueError (see
+        # HamiltonianSTL.path_order).
+        if self.width * self.height > 1 and not self.h.H.any() and not self.h.V.any():
+            return []
+        order = self.h.path_order()
+        return list(zip((order % self.width).tolist(), (order // self.width).tolist()))
+
+    def _refresh_path(self):
+        try:
+            self._rebuild_order()
+        except ValueError as err:
+            print("Invalid path:", err)
+            self._set_order(None)
+
+    def _rebuild_order(self):
+        # O(cells); raises ValueError like generate_path_from_edges.
+        if self.width * self.height > 1 and not self.h.H.any() and not self.h.V.any():
+            self._set_order(None)
+        else:
+            self._set_order(self.h.path_order())
 
-    def compute_fitness(self):
-        crossings = 0
-        for y in range(self.height):
-            for x in range(self.width - 1):
-                if self.h.H[y][x] and self.zones[(x, y)] != self.zones[(x + 1, y)]:
-                    crossings += 1
-        for y in range(self.height - 1):
-            for x in range(self.width):
-                if self.h.V[y][x] and self.zones[(x, y)] != self.zones[(x, y + 1)]:
-                    crossings += 1
-        return crossings
-    
-    def plot(self, title="Hamiltonian Path"):
-        fig, ax = plt.subplots()
-        self.ax = ax 
-        plt.subplots_adjust(bottom=0.3)
-        self._plot_on_ax(ax)
+    def _set_order(self, order):
+        self._path = None
+        if order is None:
+            self.order = self.position = None
+            return
+        self.order = np.array(order, dtype=np.int64)
+        self.position = np.empty_like(self.order)
+        self.position[self.order] = np.arange(len(self.order))
+
+    @property
+    def path(self):
+        if self._path is None:
+            if self.order is None:
+                self._path = []
+            else:
+                self._path = list(zip((self.order % self.width).tolist(), (self.order // self.width).tolist()))
+        return self._path
+
+    @path.setter
+    def path(self, cells):
+        if len(cells) == 0:
+            self._set_order(None)
+            return
+        cells = np.asarray(cells, dtype=np.int64)
+        self._set_order(cells[:, 1] * self.width + cells[:, 0])
+        self._path = [tuple(cell) for cell in cells.tolist()]
+
+    def position_of(self, x, y):
+        # Index of cell (x, y) in the print order, O(1).
+        return int(self.position[y * self.width + x])
+
+    def splice_path(self, x, y, w, h):
+        # Updates the order after a legal move changed the edges inside the
+        # w x h window at (x, y). The path enters and leaves the window at
+        # the same cells as before, so only the pieces inside it are
+        # re-walked; the order between the window's first and last cells
+        # is rewritten and everything outside that span is untouched.
+        if self.order is None:
+            return
+        width, order, position = self.width, self.order, self.position
+        cells = [(y + dy) * width + x + dx for dy in range(h) for dx in range(w)]
+        spots = sorted(position[cells].tolist())
+
+        # Pieces are runs of consecutive positions inside the window.
+        pieces = []
+        start = prev = spots[0]
+        for spot in spots[1:]:
+            if spot != prev + 1:
+                pieces.append((start, prev))
+                start = spot
+            prev = spot
+        pieces.append((start, prev))
+
+        inside = set(cells)
+        H, V = self.h.H, self.h.V
+        parts = []
+        cursor = pieces[0][0]
+        for first, last in pieces:
+            if first > cursor:
+                parts.append(order[cursor:first].copy())
+            walk = [int(order[first])]
+            end, prev = int(order[last]), -1
+            while walk[-1] != end:
+                cur = walk[-1]
+                cx, cy = cur % width, cur // width
+                for nxt, linked in (
+                    (cur - 1, cx > 0 and H[cy, cx - 1]),
+                    (cur + 1, cx < width - 1 and H[cy, cx]),
+                    (cur - width, cy > 0 and V[cy - 1, cx]),
+                    (cur + width, cy < self.height - 1 and V[cy, cx]),
+                ):
+                    if linked and nxt != prev and nxt in inside:
+                        break
+                else:
+                    raise RuntimeError(f"Window at {(x, y)} no longer joins the same path pieces")
+                prev = cur
+                walk.append(nxt)
+            parts.append(np.array(walk, dtype=np.int64))
+            cursor = last + 1
+
+        lo, hi = pieces[0][0], pieces[-1][1] + 1
+        span = np.concatenate(parts)
+        order[lo:hi] = span
+        position[span] = np.arange(lo, hi)
+        self._path = None
+
+    @staticmethod
+    def default_zone_map(width, height):
+        # Two zones split down the middle: 1 on the left, 2 on the right.
+        row = np.where(np.arange(width) < width // 2, 1, 2)
+        return np.tile(row, (height, 1))
+
+    def set_zone_map(self, zone_map):
+        # zone_map[y, x] is the zone of cell (x, y), any number of zones. The
+        # crossing masks mark the H/V edges whose two cells lie in different
+        # zones. The map is copied so later changes to the caller's array
+        # (or the file it maps) cannot reach the zoning.
+        zone_map = np.array(zone_map, dtype=np.int32)
+        if zone_map.shape != (self.height, self.width):
+            raise ValueError(f"Zone map is {zone_map.shape}, expected {(self.height, self.width)}")
+        self.zone_map = zone_map
+        self._cross_h = self.zone_map[:, :-1] != self.zone_map[:, 1:]
+        self._cross_v = self.zone_map[:-1, :] != self.zone_map[1:, :]
+        # Flat indices of the boundary edges. When boundaries are sparse,
+        # compute_fitness() reads only these; past about one edge in seven a
+        # full masked count is faster, and the index is None.
+        boundary = np.count_nonzero(self._cross_h) + np.count_nonzero(self._cross_v)
+        if boundary * 7 < self._cross_h.size + self._cross_v.size:
+            self._boundary_h = np.flatnonzero(self._cross_h)
+            self._boundary_v = np.flatnonzero(self._cross_v)
+        else:
+            self._boundary_h = self._boundary_v = None
+        self.refresh_fitness()
+
+    def load_zone_map(self, file_path):
+        self.set_zone_map(read_zone_map(file_path))
+
+    @property
+    def zones(self):
+        # Dict view {(x, y): zone} for older callers; prefer zone_map.
+        return {
+            (x, y): zone
+            for y, row in enumerate(self.zone_map.tolist())
+            for x, zone in enumerate(row)
+        }
 
-        btn_load_ax = plt.axes([0.1, 0.05, 0.2, 0.075])
-        btn_load = Button(btn_load_ax, 'Load File', color='lightgray', hovercolor='gray')
-        btn_load.on_clicked(lambda event: self.load_edges_from_file(self.ax))
+    def set_cost_model(self, cost_model):
+        self.cost_model = cost_model
+        self.refresh_fitness()
 
-        btn_save_ax = plt.axes([0.4, 0.05, 0.2, 0.075])
-        btn_save = Button(btn_save_ax, 'Save Path', color='lightgray', hovercolor='gray')
-        btn_save.on_clicked(lambda event: self.save_path_to_file())
+    def refresh_fitness(self):
+        # Recounts fitness and the turn cache from the edges; needed after
+        # changing edges outside mutate()/try_move().
+        if self.cost_model is not None:
+            self._turns = turn_cells(self.h.H, self.h.V)
+        else:
+            self._turns = None
+        self.fitness = self.compute_fitness()
 
-        btn_run_ax = plt.axes([0.7, 0.05, 0.2, 0.075])
-        btn_run = Button(btn_run_ax, '▶ Run', color='#98FB98', hovercolor='#90EE90')
-        btn_run.on_clicked(lambda event: self.run_method_placeholder())
+    def compute_fitness(self):
+        crossings = self.compute_crossings()
+        if self.cost_model is None:
+            return crossings
+        return self.cost_model.cost(crossings, self.h.H, self.h.V)
+
+    def estimated_print_time(self):
+        # Seconds, from the cost model's printer settings or the defaults.
+        model = self.cost_model if self.cost_model is not None else CostModel()
+        return model.print_time(self.h.H, self.h.V)
+
+    def compute_crossings(self):
+        H, V = self.h.H, self.h.V
+        if self._boundary_h is not None:
+            return int(
+                np.count_nonzero(H.reshape(-1)[self._boundary_h])
+                + np.count_nonzero(V.reshape(-1)[self._boundary_v])
+            )
+        return int(np.count_nonzero(H & self._cross_h) + np.count_nonzero(V & self._cross_v))
+
+    def _window_crossings(self, x, y, w, h):
+        # Crossings on the edges inside a w x h window; moves only touch these.
+        return int(
+            np.count_nonzero(self.h.H[y:y + h, x:x + w - 1] & self._cross_h[y:y + h, x:x + w - 1])
+            + np.count_nonzero(self.h.V[y:y + h - 1, x:x + w] & self._cross_v[y:y + h - 1, x:x + w])
+        )
+
+    def _window_cost(self, x, y, w, h, moved=False):
+        # The part of fitness a move in the window can change. Before the
+        # move (moved=False) turns come from the cache; after it they are
+        # recounted and held until _after_move() stores them.
+        crossings = self._window_crossings(x, y, w, h)
+        model = self.cost_model
+        if model is None:
+            return crossings
+        cost = model.crossing * crossings
+        if model.turn:
+            if moved:
+                self._pending_turns = turn_cells(self.h.H, self.h.V, x, y, x + w, y + h)
+                cost += model.turn * np.count_nonzero(self._pending_turns)
+            else:
+                cost += model.turn * np.count_nonzero(self._turns[y:y + h, x:x + w])
+        if model.segment:
+            cost += model.segment * model.window_overhead(self.h.H, self.h.V, x, y, w, h)
+        return cost
+
+    def _after_move(self, x, y, w, h):
+        if self.cost_model is not None and self.cost_model.turn:
+            self._turns[y:y + h, x:x + w] = self._pending_turns
+        if self.order is not None:
+            self.splice_path(x, y, w, h)
+
+    def _check_fitness(self):
+        actual = self.compute_fitness()
+        if abs(actual - self.fitness) > 1e-6 * max(1.0, abs(actual)):
+            raise RuntimeError(f"Cached fitness {self.fitness} does not match recount {actual}")
 
-        plt.show()
+    def plot(self, title="Hamiltonian Path"):
+        import Zoning_GUI
+        Zoning_GUI.plot(self, title)
 
     def save_path_to_file(self):
-        import tkinter as tk
-        from tkinter import filedialog
-
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
-        if not file_path:
-            print("Save cancelled.")
-            return
-
-        with open(file_path, 'w') as f:
-            for i in range(len(self.path) - 1):
-                x1, y1 = self.path[i]
-                x2, y2 = self.path[i + 1]
-                f.write(f"{x1},{y1},{x2},{y2}\n")
-
-        print(f"Path saved to {file_path}")
+        import Zoning_GUI
+        Zoning_GUI.save_path_to_file(self)
+
+    def save_path(self, file_path, include_order=False, **toolpath):
+        # .hpl writes the binary layer format, G-code extensions a merged-run
+        # toolpath (toolpath options go to Toolpath.write_gcode), anything
+        # else the text format. The binary file stores the zone map only when
+        # it is not the default and the path order only on request, since
+        # both can be rebuilt.
+        if file_path.endswith(GCODE_EXTENSIONS):
+            if self.order is None:
+                raise ValueError("No valid path to export")
+            write_gcode(file_path, self.order, self.width, **toolpath)
+        elif file_path.endswith(".hpl"):
+            default = self.default_zone_map(self.width, self.height)
+            zone_map = None if np.array_equal(self.zone_map, default) else self.zone_map
+            path = self.path if include_order else None
+            write_layer(file_path, self.h, zone_map=zone_map, path=path)
+        else:
+            write_text_path(file_path, self.path)
 
     def run_method_placeholder(self):
-        # Top-right transpose
-        x_top, y_top = self.width - 3, 0
-        if x_top >= 0 and y_top + 2 < self.height:
-            subgrid_top = self.h.get_subgrid_by_corners((x_top, y_top), (x_top + 2, y_top + 2))
-            self.ax.clear()
-            self._plot_on_ax(self.ax)
-            self._highlight_subgrid(self.ax, subgrid_top, color='orange')
-            plt.draw()
-            plt.pause(1.5)
-
-            _, result_top = self.h.transpose_subgrid(subgrid_top)
-            print("Top-right transpose result:", result_top)
-
-            self.ax.clear()
-            self.path = self.generate_path_from_edges()
-            self._plot_on_ax(self.ax)
-            self._highlight_subgrid(self.ax, subgrid_top, color='green')
-            plt.draw()
-            plt.pause(1.0)
-
-            x = self.width - 3
-            y = self.height - 4 
-
-            if x < 0 or y < 0 or x + 2 >= self.width or y + 2 >= self.height:
-                print("Corrected Bottom-right 3x3 subgrid is out of bounds.")
-                return
-
-            subgrid = self.h.get_subgrid_by_corners((x, y), (x + 2, y + 2))
-
-            self.ax.clear()
-            self._plot_on_ax(self.ax)
-            self._highlight_subgrid(self.ax, subgrid, color='orange')
-            plt.draw()
-            plt.pause(1.5)
-
-            _, result = self.h.transpose_subgrid(subgrid)
-            print("Corrected Bottom-right transpose result:", result)
-
-            self.ax.clear()
-            self.path = self.generate_path_from_edges()
-            self._plot_on_ax(self.ax)
-            self._highlight_subgrid(self.ax, subgrid, color='green')
-            plt.draw()
-
+        import Zoning_GUI
+        Zoning_GUI.run_method_placeholder(self)
 
     def mutate(self):
-        operation = random.choice(['flip', 'transpose'])
-        if operation == 'flip':
-            w, h = (3, 2) if random.random() < 0.5 else (2, 3)
-        else:
-            w, h = 3, 3
+        if self.stats is not None:
+            return self._mutate_instrumented()
+        move = self.h.random_move()
+        if move is None:
+            return self.fitness
+        name, x, y = move
+        w, h, _ = move_table(name)
+
+        before = self.fitness
+        window_before = self._window_cost(x, y, w, h)
+        self.h.begin()
+        if not self.h.apply_move(name, x, y):
+            self.h.rollback()
+            return before
 
-        x = random.randint(0, self.width - w)
-        y = random.randint(0, self.height - h)
+        after = before - window_before + self._window_cost(x, y, w, h, moved=True)
 
-        subgrid = self.h.get_subgrid_by_corners((x, y), (x + w - 1, y + h - 1))
+        if after > before:
+            self.h.rollback()
+            return before
+        self.h.commit()
+        self.fitness = after
+        self._after_move(x, y, w, h)
+        if self.debug_fitness:
+            self._check_fitness()
+        return after
 
-        Copy_H = [row[:] for row in self.h.H]
-        Copy_V = [row[:] for row in self.h.V]
+    def _mutate_instrumented(self):
+        # mutate() with per-operator counts and per-phase timings. Kept
+        # separate so the plain path carries no timer calls.
+        stats = self.stats
+        clock = time.perf_counter
+        move = self.h.random_move()
+        if move is None:
+            stats.idle += 1
+            return self.fitness
+        name, x, y = move
+        w, h, _ = move_table(name)
+        counts = stats.operator(name)
+        seconds = stats.seconds
+        counts["attempts"] += 1
+
+        before = self.fitness
+        t0 = clock()
+        window_before = self._window_cost(x, y, w, h)
+        t1 = clock()
+        self.h.begin()
+        t2 = clock()
+        applied = self.h.apply_move(name, x, y)
+        t3 = clock()
+        seconds["fitness"] += t1 - t0
+        seconds["journal"] += t2 - t1
+        seconds["move"] += t3 - t2
+        if not applied:
+            self.h.rollback()
+            counts["inapplicable"] += 1
+            return before
 
-        before = self.compute_fitness()
-        if operation == 'flip':
-            _, result = self.h.flip_subgrid(subgrid)
-        else:
-            _, result = self.h.transpose_subgrid(subgrid)
+        after = before - window_before + self._window_cost(x, y, w, h, moved=True)
+        t4 = clock()
+        seconds["fitness"] += t4 - t3
 
-        after = self.compute_fitness()
+        if after > before:
+            self.h.rollback()
+            seconds["journal"] += clock() - t4
+            counts["rejected_worse"] += 1
+            return before
+        self.h.commit()
+        seconds["journal"] += clock() - t4
+        counts["accepted"] += 1
+        if after < before:
+            counts["improved"] += 1
+        self.fitness = after
+        self._after_move(x, y, w, h)
+        if self.debug_fitness:
+            self._check_fitness()
+        return after
+
+    def try_move(self, name, x, y, accept=None):
+        # Applies one move and keeps it when accept(zoning, before, after)
+        # is true; by default when it does not add crossings. Returns the
+        # fitness afterwards. Search strategies build on this.
+        w, h, _ = move_table(name)
+        before = self.fitness
+        window_before = self._window_cost(x, y, w, h)
+        counts = self.stats.operator(name) if self.stats is not None else None
+        if counts is not None:
+            counts["attempts"] += 1
+        self.h.begin()
+        if not self.h.apply_move(name, x, y):
+            self.h.rollback()
+            if counts is not None:
+                counts["inapplicable"] += 1
+            return before
 
-        if result not in ['flipped', 'transposed'] or after > before:
-            self.h.H = Copy_H
-            self.h.V = Copy_V
+        after = before - window_before + self._window_cost(x, y, w, h, moved=True)
+        keep = after <= before if accept is None else accept(self, before, after)
+        if not keep:
+            self.h.rollback()
+            if counts is not None:
+                counts["rejected_worse"] += 1
             return before
+        self.h.commit()
+        self.fitness = after
+        self._after_move(x, y, w, h)
+        if counts is not None:
+            counts["accepted"] += 1
+            if after < before:
+                counts["improved"] += 1
+        if self.debug_fitness:
+            self._check_fitness()
         return after
 
-    def evolve(self, generations=10):
-        best_fitness = self.compute_fitness()
-        for _ in range(generations):
-            new_fitness = self.mutate()
+    def move_delta(self, name, x, y):
+        # Change in fitness the move would make, without keeping it.
+        w, h, _ = move_table(name)
+        window_before = self._window_cost(x, y, w, h)
+        self.h.begin()
+        try:
+            if not self.h.apply_move(name, x, y):
+                return 0
+            return self._window_cost(x, y, w, h, moved=True) - window_before
+        finally:
+            self.h.rollback()
+
+    def restore_edges(self, H, V):
+        # Puts back edges saved with committed_edges() and rebuilds the move
+        # index, fitness and path.
+        self.h.H[:] = H
+        self.h.V[:] = V
+        self.h.build_move_index(MUTATION_MOVES)
+        self.refresh_fitness()
+        if self.track_path:
+            self._rebuild_order()
+
+    def reseed(self, name="auto"):
+        # Replaces the edges with a constructed path from Seeds; "auto"
+        # builds each one and keeps the fewest crossings. Returns its name.
+        name, order = choose_seed(self.zone_map, name)
+        H, V = edges_from_order(order, self.width, self.height)
+        self.restore_edges(H, V)
+        return name
+
+    def instrument(self, callback=None, every=1000):
+        # Turns on EvolveStats for later mutate()/evolve() calls and returns
+        # it; callback(event) gets progress every `every` generations.
+        from Evolve_Stats import EvolveStats
+        self.stats = EvolveStats(callback, every)
+        return self.stats
+
+    def evolve(self, generations=10, time_budget=None, strategy=None, target=0, stop=None):
+        # Stops after `generations` steps (None for no limit), after
+        # `time_budget` seconds, once the best fitness reaches `target`, or
+        # once `stop` (a threading.Event, say) is set, whichever comes
+        # first. Without a strategy every step is a greedy mutate();
+        # otherwise a Search strategy drives the steps.
+        if generations is None and time_budget is None and stop is None:
+            raise ValueError("evolve() needs a generation limit, a time budget or a stop event")
+        start = time.perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        best_fitness = self.fitness
+        stats = self.stats
+        if stats is not None:
+            stats.start(best_fitness)
+        if strategy is not None:
+            strategy.start(self)
+        self.generations_run = 0
+        while best_fitness > target and (generations is None or self.generations_run < generations):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if stop is not None and stop.is_set():
+                break
+            if strategy is None:
+                new_fitness = self.mutate()
+            else:
+                new_fitness = strategy.step(self, self._progress(start, generations, time_budget))
+            self.generations_run += 1
+            if stats is not None:
+                stats.generation(new_fitness)
             if new_fitness < best_fitness:
                 best_fitness = new_fitness
-            if best_fitness == 0:
-                break
-        self.path = self.generate_path_from_edges()
+        if strategy is not None:
+            strategy.finish(self)
+            best_fitness = self.fitness
+        if stats is not None:
+            stats.finish()
         return best_fitness
 
-    def load_edges_from_file(self, ax):
-        import tkinter as tk
-        from tkinter import filedialog
-
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename(filetypes=[("Text Files", "*.txt")])
-        if not file_path:
-            print("No file selected.")
-            return
-
-        print("Loading file:", file_path)
-
-        max_x = max_y = 0
-        edges = []
-
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    x1, y1, x2, y2 = map(int, line.split(','))
-                    max_x = max(max_x, x1, x2)
-                    max_y = max(max_y, y1, y2)
-                    edges.append(((x1, y1), (x2, y2)))
-                except ValueError:
-                    print("Invalid line:", line)
-
-        new_width = max_x + 1
-        new_height = max_y + 1
-        print(f"Resizing grid to {new_width}x{new_height}")
-
-        self.h = HamiltonianSTL(new_width, new_height, use_zigzag=False)
-        self.width = new_width
-        self.height = new_height
-
-        for (p1, p2) in edges:
-            self.h.set_edge(p1, p2, True)
-
-        self.zones = {
-            (x, y): 1 if x < self.width // 2 else 2
-            for y in range(self.height)
-            for x in range(self.width)
-        }
+    def _progress(self, start, generations, time_budget):
+        # How far an evolve() run is, from 0 to 1, by whichever limit is nearer.
+        progress = 0.0
+        if generations:
+            progress = self.generations_run / generations
+        if time_budget:
+            progress = max(progress, (time.perf_counter() - start) / time_budget)
+        return min(progress, 1.0)
+
+    def evolve_population(self, generations=10, **options):
+        # Population GA over a process pool; options go to PopulationGA.
+        from Population import PopulationGA
+        return PopulationGA(self, **options).evolve(generations)
+
+    def solve_exact(self, max_width=None):
+        # Replaces the edges with an optimal path for the zone map (and the
+        # cost model's crossing and turn weights) from Exact's frontier DP.
+        # One side must be at most max_width cells, Exact.MAX_WIDTH by
+        # default. Returns the new fitness.
+        from Exact import MAX_WIDTH, solve
+        model = self.cost_model
+        if model is not None and model.segment:
+            raise ValueError("The exact solver does not support the segment term")
+        weights = {} if model is None else {"crossing": model.crossing, "turn": model.turn}
+        H, V, _ = solve(self.zone_map, max_width=max_width or MAX_WIDTH, **weights)
+        self.restore_edges(H, V)
+        return self.fitness
+
+    def adopt_edges(self, hamiltonian_stl):
+        # Swaps in another edge grid of the same size and rebuilds what
+        # depends on it.
+        self.h = hamiltonian_stl
+        self.h.check_moves = self.check_moves
+        self.h.build_move_index(MUTATION_MOVES)
+        self.refresh_fitness()
+        if self.track_path:
+            self._rebuild_order()
+
+    def evolve_tiled(self, moves_per_cell=1.0, **options):
+        # Tile-parallel optimization for large grids; options go to
+        # TiledOptimizer.
+        from Tiled import TiledOptimizer
+        return TiledOptimizer(self, **options).evolve(moves_per_cell)
 
-        self.path = self.generate_path_from_edges()
-        print(f"Generated path length: {len(self.path)}")
+    def load_edges_from_file(self, ax):
+        import Zoning_GUI
+        Zoning_GUI.load_edges_from_file(self, ax)
+
+    def load_edges(self, file_path, zone_map=None):
+        # Replaces the grid with the one in a .hpl layer file or an
+        # x1,y1,x2,y2 text file. Zones come from the layer file, else from
+        # zone_map, else the current zone map if it still fits, else the
+        # default split.
+        previous = self.zone_map
+        order = None
+        if file_path.endswith(".hpl"):
+            layer = read_layer(file_path)
+            self.h = layer.to_hamiltonian()
+            if layer.zone_map is not None:
+                zone_map = layer.zone_map
+            order = layer.order
+        else:
+            self.h = edges_from_segments(read_text_segments(file_path))
+        self.h.check_moves = self.check_moves
+        self.width = self.h.width
+        self.height = self.h.height
 
-        ax.clear()
-        self._plot_on_ax(ax)
-        plt.draw()
+        self.h.build_move_index(MUTATION_MOVES)
+        if zone_map is None:
+            if previous.shape == (self.height, self.width):
+                zone_map = previous
+            else:
+                zone_map = self.default_zone_map(self.width, self.height)
+        self.set_zone_map(zone_map)
 
+        if order is None:
+            self._refresh_path()
+        else:
+            self._set_order(order)
 
     def _plot_on_ax(self, ax):
-        ax.set_title("Hamiltonian Path", fontsize=14, fontweight='bold')
-
-        for i in range(len(self.path) - 1):
-            x0, y0 = self.path[i]
-            x1, y1 = self.path[i + 1]
-            zone0 = self.zones.get((x0, y0), 1)
-            zone1 = self.zones.get((x1, y1), 1)
-            color = "red" if zone0 != zone1 else "black"
-            ax.plot([x0, x1], [y0, y1], color=color, linewidth=2, zorder=1)
-
-        for (x, y), zone in self.zones.items():
-            ax.scatter(x, y, s=50, c="royalblue" if zone == 1 else "seagreen", edgecolors='k', zorder=2)
+        import Zoning_GUI
+        Zoning_GUI.show_on_ax(self, ax)
 
-        ax.set_aspect('equal')
-        ax.grid(True, which='major', linestyle='--', alpha=0.4)
-        ax.set_facecolor('#f8f9fa')
-        ax.invert_yaxis()
-
-    
     def animate_transposes(self, ax):
-        fig = ax.figure
-
-        for _ in range(3):
-            x = random.randint(0, self.width - 3)
-            y = random.randint(0, self.height - 3)
-            subgrid = self.h.get_subgrid_by_corners((x, y), (x + 2, y + 2))
-
-            ax.clear()
-            self._plot_on_ax(ax)
-            self._highlight_subgrid(ax, subgrid, color='orange')
-            plt.draw()
-            plt.pause(2)
-
-            _, result = self.h.transpose_subgrid(subgrid)
-
-            ax.clear()
-            self._plot_on_ax(ax)
-            self._highlight_subgrid(ax, subgrid, color='green')
-            plt.draw()
-            plt.pause(1)
-
-        self.path = self.generate_path_from_edges()
-
-        ax.clear()
-        self._plot_on_ax(ax)
-        plt.draw()
-
+        import Zoning_GUI
+        Zoning_GUI.animate_transposes(self, ax)
 
     def _highlight_subgrid(self, ax, subgrid, color='orange'):
-        for row in subgrid:
-            for pt in row:
-                if pt:
-                    x, y = pt
-                    circle = plt.Circle(
-                        (x, y), 
-                        0.4, 
-                        color=color, 
-                        alpha=0.4, 
-                        ec='black', 
-                        lw=1.5, 
-                        zorder=0
-                    )
-                    ax.add_patch(circle)
+        self._view.highlight(subgrid, color=color)
+
 
 if __name__ == "__main__":
     h = HamiltonianSTL(10, 10, use_zigzag=False)
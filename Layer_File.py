@@ -0,0 +1,235 @@
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+from Flip_Transpose import HamiltonianSTL
+
+# Binary layer file (.hpl), little-endian:
+#
+#   header   magic, version, flags, width, height, zone item size, CRC-32
+#   zones    width * height zone ids, row-major, 1/2/4-byte ints  (FLAG_ZONES)
+#   H bits   np.packbits of H, padded to 4 bytes                   (FLAG_EDGES)
+#   V bits   np.packbits of V, padded to 4 bytes                   (FLAG_EDGES)
+#   order    width * height int32 cell ids y * width + x           (FLAG_ORDER)
+#
+# The CRC covers every byte after the header. Sections start on 4-byte
+# boundaries so zones and order can be viewed straight out of an mmap.
+
+MAGIC = b"HPLF"
+VERSION = 1
+FLAG_EDGES = 1
+FLAG_ZONES = 2
+FLAG_ORDER = 4
+
+_HEADER = struct.Struct("<4sHHIIBxxxI")
+_ZONE_TYPES = {1: np.uint8, 2: np.uint16, 4: np.int32}
+
+
+def _padded(n):
+    return (n + 3) // 4 * 4
+
+
+class Layer:
+    def __init__(self, width, height, H, V, zone_map=None, order=None):
+        self.width = width
+        self.height = height
+        self.H = H
+        self.V = V
+        self.zone_map = zone_map
+        self.order = order
+
+    def to_hamiltonian(self):
+        grid = HamiltonianSTL(self.width, self.height, use_zigzag=False)
+        grid.H[:] = self.H
+        grid.V[:] = self.V
+        return grid
+
+    def path(self):
+        if self.order is None:
+            return None
+        order = np.asarray(self.order)
+        return list(zip((order % self.width).tolist(), (order // self.width).tolist()))
+
+
+def write_layer(file_path, h, zone_map=None, path=None):
+    width, height = h.width, h.height
+    flags = FLAG_EDGES
+    sections = []
+
+    zone_size = 0
+    if zone_map is not None:
+        zone_map = np.asarray(zone_map)
+        if zone_map.shape != (height, width):
+            raise ValueError(f"Zone map is {zone_map.shape}, expected {(height, width)}")
+        zone_size = next(
+            size for size, dtype in _ZONE_TYPES.items()
+            if zone_map.min() >= np.iinfo(dtype).min and zone_map.max() <= np.iinfo(dtype).max
+        )
+        flags |= FLAG_ZONES
+        sections.append(zone_map.astype(_ZONE_TYPES[zone_size]).tobytes())
+
+    sections.append(np.packbits(h.H, axis=None).tobytes())
+    sections.append(np.packbits(h.V, axis=None).tobytes())
+
+    if path:
+        if len(path) != width * height:
+            raise ValueError(f"Path covers {len(path)} cells, grid has {width * height}")
+        flags |= FLAG_ORDER
+        cells = np.asarray(path, dtype=np.int64)
+        sections.append((cells[:, 1] * width + cells[:, 0]).astype("<i4").tobytes())
+
+    sections = [section + bytes(_padded(len(section)) - len(section)) for section in sections]
+    crc = 0
+    for section in sections:
+        crc = zlib.crc32(section, crc)
+    with open(file_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, flags, width, height, zone_size, crc))
+        for section in sections:
+            f.write(section)
+
+
+def read_layer(file_path, verify=True):
+    # Maps the file read-only. order is a view into the map; the zone map
+    # is copied, since zonings keep it for as long as they live, and H and
+    # V are unpacked into bool arrays.
+    with open(file_path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{file_path}: too short for a layer file")
+    magic, version, flags, width, height, zone_size, crc = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{file_path}: not a layer file")
+    if version != VERSION:
+        raise ValueError(f"{file_path}: unsupported layer file version {version}")
+    if verify and zlib.crc32(memoryview(data)[_HEADER.size:]) != crc:
+        raise ValueError(f"{file_path}: checksum mismatch")
+
+    cells = width * height
+    offset = _HEADER.size
+    zone_map = None
+    if flags & FLAG_ZONES:
+        zone_map = np.frombuffer(data, dtype=_ZONE_TYPES[zone_size], count=cells, offset=offset)
+        zone_map = zone_map.reshape(height, width).copy()
+        offset += _padded(cells * zone_size)
+
+    edges = []
+    for shape in ((height, width - 1), (height - 1, width)):
+        count = shape[0] * shape[1]
+        size = (count + 7) // 8
+        bits = np.frombuffer(data, dtype=np.uint8, count=size, offset=offset)
+        edges.append(np.unpackbits(bits, count=count).reshape(shape).astype(bool))
+        offset += _padded(size)
+
+    order = None
+    if flags & FLAG_ORDER:
+        order = np.frombuffer(data, dtype="<i4", count=cells, offset=offset)
+
+    return Layer(width, height, edges[0], edges[1], zone_map, order)
+
+
+def read_zone_map(file_path):
+    # A zone map as a (height, width) int array, from a .npy file, the zones
+    # of a .hpl layer file, or text with one row of zone ids per line
+    # separated by commas or whitespace.
+    if file_path.endswith(".npy"):
+        zone_map = np.load(file_path)
+    elif file_path.endswith(".hpl"):
+        zone_map = read_layer(file_path).zone_map
+        if zone_map is None:
+            raise ValueError(f"{file_path}: layer file has no zone map")
+    else:
+        with open(file_path, "r") as f:
+            first = f.readline()
+        delimiter = "," if "," in first else None
+        zone_map = np.loadtxt(file_path, delimiter=delimiter, dtype=np.int64, ndmin=2)
+    if zone_map.ndim != 2:
+        raise ValueError(f"{file_path}: zone map must be 2-D, got shape {zone_map.shape}")
+    return np.asarray(zone_map, dtype=np.int32)
+
+
+def write_zone_map(file_path, zone_map):
+    zone_map = np.asarray(zone_map)
+    if file_path.endswith(".npy"):
+        np.save(file_path, zone_map)
+    else:
+        np.savetxt(file_path, zone_map, fmt="%d", delimiter=",")
+
+
+def read_text_segments(file_path):
+    # The x1,y1,x2,y2 text format as an (n, 4) int array.
+    try:
+        segments = np.loadtxt(file_path, delimiter=",", dtype=np.int64, ndmin=2)
+        # Rows of the wrong width could still reshape to (n, 4), so anything
+        # but four columns takes the line-by-line path.
+        if segments.shape[1] == 4:
+            return segments
+    except ValueError:
+        pass
+
+    # Slow path for files with malformed lines.
+    segments = []
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                x1, y1, x2, y2 = map(int, line.split(','))
+                segments.append((x1, y1, x2, y2))
+            except ValueError:
+                print("Invalid line:", line)
+    return np.array(segments, dtype=np.int64).reshape(-1, 4)
+
+
+def edges_from_segments(segments):
+    # A HamiltonianSTL just large enough for the segments, with their edges set.
+    if len(segments) == 0:
+        return HamiltonianSTL(1, 1, use_zigzag=False)
+    x1, y1, x2, y2 = segments.T
+    width = int(max(x1.max(), x2.max())) + 1
+    height = int(max(y1.max(), y2.max())) + 1
+    grid = HamiltonianSTL(width, height, use_zigzag=False)
+
+    horizontal = (y1 == y2) & (np.abs(x1 - x2) == 1)
+    vertical = (x1 == x2) & (np.abs(y1 - y2) == 1)
+    grid.H[y1[horizontal], np.minimum(x1, x2)[horizontal]] = True
+    grid.V[np.minimum(y1, y2)[vertical], x1[vertical]] = True
+    return grid
+
+
+def path_from_segments(segments):
+    # The text format lists segments in print order, so when consecutive
+    # segments chain they also give the path; otherwise None.
+    if len(segments) == 0 or not (segments[1:, :2] == segments[:-1, 2:]).all():
+        return None
+    cells = np.vstack([segments[:, :2], segments[-1:, 2:]])
+    return list(map(tuple, cells.tolist()))
+
+
+def write_text_path(file_path, path):
+    cells = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    rows = np.hstack([cells[:-1], cells[1:]])
+    with open(file_path, "w") as f:
+        for x1, y1, x2, y2 in rows.tolist():
+            f.write(f"{x1},{y1},{x2},{y2}\n")
+
+
+def text_to_binary(text_path, binary_path, zone_map=None):
+    segments = read_text_segments(text_path)
+    grid = edges_from_segments(segments)
+    path = path_from_segments(segments)
+    if path is not None and len(path) != grid.width * grid.height:
+        path = None
+    write_layer(binary_path, grid, zone_map=zone_map, path=path)
+
+
+def binary_to_text(binary_path, text_path):
+    layer = read_layer(binary_path)
+    path = layer.path()
+    if path is None:
+        from GA3 import HamiltonianZoningWithEdges
+        path = HamiltonianZoningWithEdges(layer.to_hamiltonian()).path
+    write_text_path(text_path, path)
@@ -0,0 +1,135 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Local moves as lookups on a window's internal edges.
+#
+# The internal edges of a w x h window are numbered H edges first, then V
+# edges, both row-major; bit i of a mask is set when edge i is on the path.
+# Cells are lettered a, b, c, ... row-major, the same labels the old
+# Flip_Transpose methods used.
+#
+# A move may turn mask m into mask m' only if every cell keeps its internal
+# degree and the path pieces inside the window still join the same pairs of
+# endpoints. The rest of the path cannot tell the two apart, so the result is
+# still a single Hamiltonian path.
+
+LETTERS = "abcdefghijklmnop"
+
+# name: (window width, window height, edges the move leaves in the window).
+# A target of None means "any other mask with the same degrees and
+# endpoint pairs", which covers every legal move for that window shape.
+MOVES = {
+    "transpose": (3, 3, "ad bc be cf eh gh fi"),
+    "transpose_wa": (3, 3, "ad dg gh he eb bc fi"),
+    "transpose_rl": (3, 3, "gd da gh be eh bc if"),
+    "transpose_sr": (3, 3, "ad bc be cf eh fi"),
+    "transpose_wb": (3, 3, "ab de ef gh hi fi"),
+    "transpose_ea": (3, 3, "ab bc ad de ef gh"),
+    "transpose_sl": (3, 3, "ab ad be cf dg eh"),
+    "transpose_nr": (3, 3, "be cf dg eh fi hi"),
+    "transpose_eb": (3, 3, "ab de ef dg gh hi"),
+    "flip_2x3": (2, 3, "ab ac bd ef"),
+    "flip_3x2": (3, 2, "ad bc be ef"),
+    "flip_w_3x3": (3, 3, "gh ad ab eh de if"),
+    "flip_e_3x3": (3, 3, "ab de gh ad eh bc fi"),
+    "flip_n_2x3": (2, 3, "ac bd cd ef"),
+    "flip_s_2x3": (2, 3, "ab cd ce df"),
+    "reroute_3x3": (3, 3, None),
+    "reroute_3x2": (3, 2, None),
+    "reroute_2x3": (2, 3, None),
+}
+
+
+@lru_cache(maxsize=None)
+def window_bits(w, h):
+    # (vertical, dx, dy) of the edge behind each mask bit.
+    bits = [(False, dx, dy) for dy in range(h) for dx in range(w - 1)]
+    bits += [(True, dx, dy) for dy in range(h - 1) for dx in range(w)]
+    return tuple(bits)
+
+
+def _cell_pairs(w, h):
+    return [
+        (dy * w + dx, dy * w + dx + 1) if not vertical else (dy * w + dx, (dy + 1) * w + dx)
+        for vertical, dx, dy in window_bits(w, h)
+    ]
+
+
+def _signature(w, h, mask):
+    n = w * h
+    adj = [[] for _ in range(n)]
+    for bit, (a, b) in enumerate(_cell_pairs(w, h)):
+        if mask >> bit & 1:
+            adj[a].append(b)
+            adj[b].append(a)
+    if any(len(nb) > 2 for nb in adj):
+        return None
+
+    seen = [False] * n
+    ends = []
+    for start in range(n):
+        if len(adj[start]) < 2 and not seen[start]:
+            seen[start] = True
+            prev, cur = -1, start
+            while True:
+                nxt = [c for c in adj[cur] if c != prev]
+                if not nxt:
+                    break
+                prev, cur = cur, nxt[0]
+                seen[cur] = True
+            ends.append((min(start, cur), max(start, cur)))
+    if not all(seen):
+        return None
+    return tuple(len(nb) for nb in adj), tuple(sorted(ends))
+
+
+@lru_cache(maxsize=None)
+def _classes(w, h):
+    classes = {}
+    for mask in range(1 << len(window_bits(w, h))):
+        sig = _signature(w, h, mask)
+        if sig is not None:
+            classes.setdefault(sig, []).append(mask)
+    return classes
+
+
+def _target_mask(w, h, spec):
+    bit_of = {
+        frozenset((LETTERS[a], LETTERS[b])): bit
+        for bit, (a, b) in enumerate(_cell_pairs(w, h))
+    }
+    mask = 0
+    for pair in spec.split():
+        mask |= 1 << bit_of[frozenset(pair)]
+    return mask
+
+
+@lru_cache(maxsize=None)
+def move_table(name):
+    # Returns (w, h, {input mask: output mask}), built on first use.
+    w, h, spec = MOVES[name]
+    classes = _classes(w, h)
+    table = {}
+    if spec is None:
+        for members in classes.values():
+            for i, mask in enumerate(members):
+                if len(members) > 1:
+                    table[mask] = members[(i + 1) % len(members)]
+    else:
+        target = _target_mask(w, h, spec)
+        for mask in classes.get(_signature(w, h, target), []):
+            if mask != target:
+                table[mask] = target
+    return w, h, table
+
+
+@lru_cache(maxsize=None)
+def move_lookup(name):
+    # move_table as an array indexed by input mask, -1 where the move does
+    # not apply; used to test every window of a grid at once.
+    w, h, table = move_table(name)
+    lookup = np.full(1 << len(window_bits(w, h)), -1, dtype=np.int64)
+    for mask, target in table.items():
+        lookup[mask] = target
+    return lookup
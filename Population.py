@@ -0,0 +1,95 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from Flip_Transpose import HamiltonianSTL
+from GA3 import HamiltonianZoningWithEdges
+
+
+# The zone map and cost model are sent once per worker process by the pool
+# initializer, so children are scored in the same units as the seed.
+_zone_map = None
+_cost_model = None
+
+
+def _set_scoring(zone_map, cost_model):
+    global _zone_map, _cost_model
+    _zone_map = zone_map
+    _cost_model = cost_model
+
+
+# Individuals travel between processes as (width, height, packed edges), where
+# packed is HamiltonianSTL.pack(): one bit per edge instead of pickled arrays.
+def _breed(task):
+    width, height, packed, steps, seed = task
+    random.seed(seed)
+    # Children only need fitness and edges; skipping the path order saves
+    # an O(cells) walk per child.
+    zoning = HamiltonianZoningWithEdges(
+        HamiltonianSTL.unpack(width, height, packed), zone_map=_zone_map, track_path=False,
+        cost_model=_cost_model,
+    )
+    for _ in range(steps):
+        if zoning.mutate() == 0:
+            break
+    return zoning.fitness, zoning.h.pack()
+
+
+class PopulationGA:
+    def __init__(self, zoning, population_size=16, elite=2, tournament_size=3,
+                 steps_per_child=50, workers=None, seed=None):
+        if population_size < 1 or not 0 <= elite <= population_size:
+            raise ValueError("Need population_size >= 1 and 0 <= elite <= population_size")
+        self.zoning = zoning
+        self.population_size = population_size
+        self.elite = elite
+        self.tournament_size = tournament_size
+        self.steps_per_child = steps_per_child
+        # workers=0 breeds in this process, which is handy for debugging.
+        self.workers = os.cpu_count() if workers is None else workers
+        self.rng = random.Random(seed)
+        self.population = []
+
+    def _select(self):
+        contenders = self.rng.sample(self.population, min(self.tournament_size, len(self.population)))
+        return min(contenders, key=lambda ind: ind[0])
+
+    def _tasks(self, parents):
+        width, height = self.zoning.width, self.zoning.height
+        return [
+            (width, height, packed, self.steps_per_child, self.rng.getrandbits(32))
+            for _, packed in parents
+        ]
+
+    def evolve(self, generations=10):
+        seed = (self.zoning.fitness, self.zoning.h.pack())
+        self.population = [seed] * self.population_size
+
+        scoring = (self.zoning.zone_map, self.zoning.cost_model)
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(self.workers, initializer=_set_scoring, initargs=scoring)
+        else:
+            pool = None
+            _set_scoring(*scoring)
+        try:
+            for _ in range(generations):
+                ranked = sorted(self.population, key=lambda ind: ind[0])
+                if ranked[0][0] == 0:
+                    break
+                parents = [self._select() for _ in range(self.population_size - self.elite)]
+                tasks = self._tasks(parents)
+                if pool is None:
+                    children = list(map(_breed, tasks))
+                else:
+                    chunk = max(1, len(tasks) // (4 * self.workers))
+                    children = list(pool.map(_breed, tasks, chunksize=chunk))
+                self.population = ranked[:self.elite] + children
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best_fitness, best_packed = min(self.population, key=lambda ind: ind[0])
+        self.zoning.adopt_edges(
+            HamiltonianSTL.unpack(self.zoning.width, self.zoning.height, best_packed)
+        )
+        return best_fitness
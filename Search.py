@@ -0,0 +1,160 @@
+import math
+import random
+from collections import deque
+
+# Search strategies for HamiltonianZoningWithEdges.evolve(strategy=...).
+#
+# evolve() owns the loop and its stopping rules; a strategy only decides
+# which move to try and whether to keep it. step() gets the run's progress
+# from 0 to 1 (by generations or by time budget) and returns the fitness
+# after the step. Strategies that accept worse moves remember the best
+# edges they have left and finish() puts them back.
+
+
+class SearchStrategy:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed) if seed is not None else random
+
+    def start(self, zoning):
+        self.best_fitness = zoning.fitness
+        self._best_edges = None
+        self._at_best = True
+
+    def step(self, zoning, progress):
+        raise NotImplementedError
+
+    def finish(self, zoning):
+        if zoning.fitness > self.best_fitness and self._best_edges is not None:
+            H, V = self._best_edges
+            zoning.restore_edges(H, V)
+        self._best_edges = None
+
+    def _keep(self, zoning, before, after):
+        # Called with the move still open; snapshots the best edges before
+        # the search walks away from them.
+        if after > before and self._at_best:
+            self._best_edges = zoning.h.committed_edges()
+            self._at_best = False
+        return True
+
+    def _moved(self, after):
+        if after < self.best_fitness:
+            self.best_fitness = after
+            self._at_best = True
+
+
+class Greedy(SearchStrategy):
+    # What evolve() does without a strategy: keep any move that is not worse.
+    def step(self, zoning, progress):
+        move = zoning.h.random_move(self.rng)
+        if move is None:
+            return zoning.fitness
+        return zoning.try_move(*move)
+
+
+def _geometric(t0, t_end, progress):
+    return t0 * (t_end / t0) ** progress
+
+
+def _linear(t0, t_end, progress):
+    return t0 + (t_end - t0) * progress
+
+
+def _logarithmic(t0, t_end, progress):
+    # Fast early drop with a long tail, reaching t_end at progress 1.
+    return t0 - (t0 - t_end) * math.log1p(99 * progress) / math.log(100)
+
+
+SCHEDULES = {"geometric": _geometric, "linear": _linear, "logarithmic": _logarithmic}
+
+
+class SimulatedAnnealing(SearchStrategy):
+    # Keeps a move that adds `delta` crossings with probability
+    # exp(-delta / T). T falls from t0 to t_end over the run following
+    # `schedule`, a SCHEDULES name or a callable (t0, t_end, progress) -> T.
+    def __init__(self, t0=2.0, t_end=0.05, schedule="geometric", seed=None):
+        super().__init__(seed)
+        if not 0 < t_end <= t0:
+            raise ValueError("Need 0 < t_end <= t0")
+        if not callable(schedule):
+            if schedule not in SCHEDULES:
+                raise ValueError(f"Unknown cooling schedule {schedule!r}, expected one of {sorted(SCHEDULES)}")
+            schedule = SCHEDULES[schedule]
+        self.t0 = t0
+        self.t_end = t_end
+        self.schedule = schedule
+        self.temperature = t0
+
+    def step(self, zoning, progress):
+        move = zoning.h.random_move(self.rng)
+        if move is None:
+            return zoning.fitness
+        self.temperature = self.schedule(self.t0, self.t_end, progress)
+        after = zoning.try_move(*move, accept=self._accept)
+        self._moved(after)
+        return after
+
+    def _accept(self, zoning, before, after):
+        if after > before and self.rng.random() >= math.exp((before - after) / self.temperature):
+            return False
+        return self._keep(zoning, before, after)
+
+
+class TabuSearch(SearchStrategy):
+    # Each step probes `candidates` applicable moves and makes the best one
+    # that is not tabu, even when it is worse. A window (name, x, y) stays
+    # tabu for the next `tenure` steps after a move there, so the search
+    # cannot undo it straight away; a tabu move is still allowed when it
+    # beats the best fitness so far.
+    def __init__(self, tenure=50, candidates=8, seed=None):
+        super().__init__(seed)
+        if tenure < 0 or candidates < 1:
+            raise ValueError("Need tenure >= 0 and candidates >= 1")
+        self.tenure = tenure
+        self.candidates = candidates
+
+    def start(self, zoning):
+        super().start(zoning)
+        self._recent = deque()
+        self._tabu = {}
+
+    def step(self, zoning, progress):
+        before = zoning.fitness
+        best_move, best_after = None, None
+        for _ in range(self.candidates):
+            move = zoning.h.random_move(self.rng)
+            if move is None:
+                return before
+            after = before + zoning.move_delta(*move)
+            if move in self._tabu and after >= self.best_fitness:
+                continue
+            if best_after is None or after < best_after:
+                best_move, best_after = move, after
+        if best_move is None:
+            return before
+
+        after = zoning.try_move(*best_move, accept=self._keep)
+        self._moved(after)
+        self._make_tabu(best_move)
+        return after
+
+    def _make_tabu(self, move):
+        if self.tenure == 0:
+            return
+        self._recent.append(move)
+        self._tabu[move] = self._tabu.get(move, 0) + 1
+        if len(self._recent) > self.tenure:
+            old = self._recent.popleft()
+            if self._tabu[old] == 1:
+                del self._tabu[old]
+            else:
+                self._tabu[old] -= 1
+
+
+STRATEGIES = {"greedy": Greedy, "anneal": SimulatedAnnealing, "tabu": TabuSearch}
+
+
+def make_strategy(name, **options):
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {name!r}, expected one of {sorted(STRATEGIES)}")
+    return STRATEGIES[name](**options)
@@ -0,0 +1,169 @@
+import numpy as np
+
+# Constructed starting paths for HamiltonianZoningWithEdges.reseed().
+#
+# Each generator takes the zone map and returns the path as an order of cell
+# ids (y * width + x). Scoring an order costs one vectorized pass, so
+# choose_seed() simply builds every candidate and keeps the one with the
+# fewest crossings, then the fewest turns.
+
+
+def row_zigzag(zone_map):
+    # The HamiltonianSTL.zigzag() path: rows, alternating direction.
+    height, width = zone_map.shape
+    ids = np.arange(height * width).reshape(height, width)
+    ids[1::2] = ids[1::2, ::-1]
+    return ids.reshape(-1)
+
+
+def column_snake(zone_map):
+    # Columns, alternating direction; crosses each vertical boundary once.
+    return _transposed(row_zigzag, zone_map)
+
+
+def spiral(zone_map):
+    # Clockwise rings from the outside in.
+    height, width = zone_map.shape
+    parts = []
+    x0, y0, x1, y1 = 0, 0, width - 1, height - 1
+    while x0 <= x1 and y0 <= y1:
+        parts.append(y0 * width + np.arange(x0, x1 + 1))
+        parts.append(np.arange(y0 + 1, y1 + 1) * width + x1)
+        if y1 > y0:
+            parts.append(y1 * width + np.arange(x1 - 1, x0 - 1, -1))
+        if x1 > x0:
+            parts.append(np.arange(y1 - 1, y0, -1) * width + x0)
+        x0, y0, x1, y1 = x0 + 1, y0 + 1, x1 - 1, y1 - 1
+    return np.concatenate(parts)
+
+
+def zone_serpentine(zone_map):
+    # Cuts the grid into bands at every row where a horizontal zone boundary
+    # lies and snakes through each band column by column, so a band enters
+    # and leaves each zone it spans once. Consecutive bands join at a single
+    # cell: each band starts on its top row above where the last one ended
+    # and must end on its bottom row. Where parity rules that out, a band
+    # runs its first or last two columns row by row instead; failing that,
+    # it merges with the band before it.
+    height, width = zone_map.shape
+    starts = [0] + (np.flatnonzero((zone_map[1:] != zone_map[:-1]).any(axis=1)) + 1).tolist()
+    parts = []
+    b = 0
+    while b < len(starts):
+        y0 = starts[b]
+        y1 = starts[b + 1] if b + 1 < len(starts) else height
+        entry = None if b == 0 else int(parts[-1][-1] % width)
+        band = _band(width, y0, y1, entry, last=b + 1 == len(starts))
+        if band is None:
+            if b == 0:
+                del starts[1]
+            else:
+                del starts[b]
+                del parts[b - 1:]
+                b -= 1
+            continue
+        parts.append(band)
+        b += 1
+    return np.concatenate(parts)
+
+
+def _band(width, y0, y1, entry, last):
+    # Path through rows [y0, y1) starting on row y0 at column `entry` (any
+    # top corner when None) and, unless last, ending on row y1 - 1.
+    for cols in (list(range(width)), list(range(width - 1, -1, -1))):
+        for head, tail in ((False, False), (False, True), (True, False), (True, True)):
+            if len(cols) < 2 * (head + tail):
+                continue
+            if entry is not None and cols[1 if head else 0] != entry:
+                continue
+            order = _band_order(width, y0, y1, cols, head, tail)
+            if order is not None and (last or order[-1] // width == y1 - 1):
+                return order
+    return None
+
+
+def _band_order(width, y0, y1, cols, head, tail):
+    # Optional head (first two columns, row by row from the second one),
+    # the middle columns alternating down and up, then an optional tail
+    # (last two columns, row by row). None if the pieces do not join.
+    rows = np.arange(y0, y1)
+    parts = []
+    at_top = True
+    if head:
+        pairs = np.where((rows - y0)[:, None] % 2 == 0, [cols[1], cols[0]], [cols[0], cols[1]])
+        parts.append((rows[:, None] * width + pairs).reshape(-1))
+        at_top = False
+    for x in cols[2 if head else 0:len(cols) - 2 if tail else len(cols)]:
+        parts.append((rows if at_top else rows[::-1]) * width + x)
+        at_top = not at_top
+    if tail:
+        ordered = rows if at_top else rows[::-1]
+        steps = np.arange(len(rows))[:, None] % 2 == 0
+        pairs = np.where(steps, [cols[-2], cols[-1]], [cols[-1], cols[-2]])
+        parts.append((ordered[:, None] * width + pairs).reshape(-1))
+    order = np.concatenate(parts)
+    steps = np.abs(np.diff(order))
+    if not ((steps == width) | ((steps == 1) & (np.minimum(order[:-1], order[1:]) % width != width - 1))).all():
+        return None
+    return order
+
+
+def zone_serpentine_columns(zone_map):
+    # zone_serpentine() with bands of columns, for vertical boundaries.
+    return _transposed(zone_serpentine, zone_map)
+
+
+def _transposed(generator, zone_map):
+    height, width = zone_map.shape
+    order = generator(zone_map.T)
+    return (order % height) * width + order // height
+
+
+SEEDS = {
+    "rows": row_zigzag,
+    "columns": column_snake,
+    "spiral": spiral,
+    "zone_rows": zone_serpentine,
+    "zone_columns": zone_serpentine_columns,
+}
+
+
+def estimate(zone_map, order):
+    # (crossings, turns) of the path.
+    zones = zone_map.reshape(-1)
+    steps = np.diff(order)
+    return (
+        int(np.count_nonzero(zones[order[1:]] != zones[order[:-1]])),
+        int(np.count_nonzero(steps[1:] != steps[:-1])),
+    )
+
+
+def choose_seed(zone_map, name="auto"):
+    # Returns (name, order) for a SEEDS name, or for "auto" the best one.
+    zone_map = np.asarray(zone_map)
+    if name != "auto":
+        if name not in SEEDS:
+            raise ValueError(f"Unknown seed {name!r}, expected 'auto' or one of {sorted(SEEDS)}")
+        return name, SEEDS[name](zone_map)
+    best = None
+    for candidate, generator in SEEDS.items():
+        order = generator(zone_map)
+        score = estimate(zone_map, order)
+        if best is None or score < best[0]:
+            best = (score, candidate, order)
+    return best[1], best[2]
+
+
+def edges_from_order(order, width, height):
+    # H and V edge arrays of the path; every step must join neighbours.
+    order = np.asarray(order, dtype=np.int64)
+    a, b = np.minimum(order[:-1], order[1:]), np.maximum(order[:-1], order[1:])
+    horizontal = (b - a == 1) & (b % width != 0)
+    vertical = b - a == width
+    if not (horizontal | vertical).all():
+        raise ValueError("Order steps between cells that are not neighbours")
+    H = np.zeros((height, width - 1), dtype=bool)
+    V = np.zeros((height - 1, width), dtype=bool)
+    H[a[horizontal] // width, a[horizontal] % width] = True
+    V[a[vertical] // width, a[vertical] % width] = True
+    return H, V
@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Batch_Optimize import add_output_arguments, expand_inputs, output_path, toolpath_options
+
+# Multi-layer parts.
+#
+# A part is a stack of layer files optimized bottom to top. Consecutive
+# layers of the same size form a group. Each layer in a group starts from
+# the best of its own path, a constructed seed (Seeds) and the result of
+# the layer below (a warm start), which wins ties and anything within
+# `warm_tolerance`. A warm start is already close for a similar layer, so
+# it gets only `warm_fraction` of the budget, and a layer whose zone map
+# matches an earlier one in the group reuses its result outright. Groups
+# share nothing and run in parallel; group_size cuts long groups into
+# chunks so they can too, at the cost of a cold start per chunk. By default
+# the chunks give every worker one, since a part's layers are often all the
+# same size and would otherwise form one serial group.
+
+
+def natural_key(file_path):
+    # layer_2 before layer_10.
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", file_path)]
+
+
+def layer_shape(file_path):
+    from Layer_File import edges_from_segments, read_layer, read_text_segments
+    if file_path.endswith(".hpl"):
+        layer = read_layer(file_path, verify=False)
+        return layer.width, layer.height
+    grid = edges_from_segments(read_text_segments(file_path))
+    return grid.width, grid.height
+
+
+def layer_groups(shapes, group_size=None):
+    # Runs of consecutive layer indices with the same shape, cut into
+    # chunks of at most group_size.
+    groups = []
+    for i, shape in enumerate(shapes):
+        if groups and shapes[groups[-1][-1]] == shape and (not group_size or len(groups[-1]) < group_size):
+            groups[-1].append(i)
+        else:
+            groups.append([i])
+    return groups
+
+
+def _optimize_group(task):
+    from Flip_Transpose import HamiltonianSTL
+    from GA3 import HamiltonianZoningWithEdges
+    from Search import make_strategy
+
+    layers, options = task
+    below = None
+    # Packed results by zone map digest, for layers that repeat.
+    solved = {}
+    summaries = []
+    for index, file_path, zones, out_path in layers:
+        summary = {"layer": index, "file": file_path, "output": out_path}
+        try:
+            random.seed(options["seed"] + index)
+            start = time.perf_counter()
+            zoning = HamiltonianZoningWithEdges.from_file(file_path)
+            if zones:
+                zoning.load_zone_map(zones)
+            cells = zoning.width * zoning.height
+            summary.update(width=zoning.width, height=zoning.height)
+            summary["initial_fitness"] = zoning.fitness if len(zoning.path) == cells else None
+
+            digest = hashlib.sha1(zoning.zone_map.tobytes()).hexdigest()
+            if digest in solved:
+                grid = HamiltonianSTL.unpack(zoning.width, zoning.height, solved[digest])
+                zoning.restore_edges(grid.H, grid.V)
+                source, generations, time_budget = "copied", 0, None
+            else:
+                source, generations, time_budget, skipped = _best_start(zoning, below, cells, options)
+                if skipped is not None:
+                    summary["warm_skipped"] = skipped
+            summary.update(start=source, start_fitness=zoning.fitness)
+
+            if generations != 0:
+                strategy = options["strategy"]
+                strategy = make_strategy(strategy, seed=options["seed"] + index) if strategy else None
+                zoning.evolve(generations, time_budget=time_budget, strategy=strategy)
+                summary["generations"] = zoning.generations_run
+            else:
+                summary["generations"] = 0
+
+            if options["toolpath"] is not None:
+                zoning.save_path(out_path, **options["toolpath"])
+            else:
+                zoning.save_path(out_path)
+            summary.update(final_fitness=zoning.fitness, seconds=round(time.perf_counter() - start, 3))
+            below = (zoning.h.H.copy(), zoning.h.V.copy())
+            solved[digest] = zoning.h.pack()
+        except Exception as err:
+            summary["error"] = f"{type(err).__name__}: {err}"
+            below = None
+        summaries.append(summary)
+    return summaries
+
+
+def _best_start(zoning, below, cells, options):
+    # Leaves the zoning on the best of its own path, a constructed seed and
+    # the layer below; returns (source, generations, time_budget, skipped).
+    # The warm start wins ties and anything within warm_tolerance of the
+    # best other start, since it runs on the smaller budget; skipped is its
+    # fitness when it lost, else None.
+    candidates = []
+    if len(zoning.path) == cells:
+        candidates.append((zoning.fitness, "file", zoning.h.H.copy(), zoning.h.V.copy()))
+    name = zoning.reseed("auto")
+    candidates.append((zoning.fitness, "seed:" + name, zoning.h.H.copy(), zoning.h.V.copy()))
+    fitness, source, H, V = min(candidates, key=lambda c: c[0])
+    current, skipped = candidates[-1][1], None
+    if below is not None:
+        zoning.restore_edges(*below)
+        current = "warm"
+        if zoning.fitness <= fitness + options["warm_tolerance"]:
+            source = "warm"
+        else:
+            skipped = zoning.fitness
+    if source != current:
+        zoning.restore_edges(H, V)
+
+    generations, time_budget = options["generations"], options["time_budget"]
+    if source == "warm":
+        fraction = options["warm_fraction"]
+        if generations is not None:
+            generations = int(generations * fraction)
+        if time_budget is not None:
+            time_budget *= fraction
+    return source, generations, time_budget, skipped
+
+
+class StackOptimizer:
+    def __init__(self, files, out_dir, zone_files=None, generations=10000, time_budget=None,
+                 warm_fraction=0.25, group_size=None, workers=None, seed=0, strategy=None,
+                 fmt="same", toolpath=None, warm_tolerance=0.0):
+        if zone_files is not None and len(zone_files) != len(files):
+            raise ValueError(f"Got {len(zone_files)} zone maps for {len(files)} layers")
+        if generations is None and time_budget is None:
+            raise ValueError("Need a generation limit or a time budget per layer")
+        if not 0 <= warm_fraction <= 1:
+            raise ValueError("warm_fraction must be between 0 and 1")
+        if warm_tolerance < 0:
+            raise ValueError("warm_tolerance must not be negative")
+        self.files = list(files)
+        self.zone_files = zone_files
+        self.out_dir = out_dir
+        self.group_size = group_size
+        # workers=0 or 1 runs every group in this process.
+        self.workers = os.cpu_count() if workers is None else workers
+        self.fmt = fmt
+        self.options = {
+            "generations": generations, "time_budget": time_budget, "warm_fraction": warm_fraction,
+            "warm_tolerance": warm_tolerance,
+            "seed": seed, "strategy": strategy, "toolpath": toolpath,
+        }
+
+    def chunk_size(self):
+        # group_size, or the layers split evenly over the workers; None
+        # keeps each group whole.
+        if self.group_size is not None:
+            return self.group_size
+        if self.workers <= 1:
+            return None
+        return math.ceil(len(self.files) / self.workers)
+
+    def groups(self):
+        return layer_groups([layer_shape(path) for path in self.files], self.chunk_size())
+
+    def _task(self, group):
+        layers = [
+            (i, self.files[i], self.zone_files[i] if self.zone_files else None,
+             output_path(self.files[i], self.out_dir, self.fmt))
+            for i in group
+        ]
+        return layers, self.options
+
+    def run(self, report=print):
+        # Optimizes every layer and returns the part's summary; report gets
+        # one line per finished group.
+        start = time.perf_counter()
+        os.makedirs(self.out_dir, exist_ok=True)
+        groups = self.groups()
+        tasks = [self._task(group) for group in groups]
+        layers = []
+        if self.workers <= 1 or len(tasks) == 1:
+            finished = map(_optimize_group, tasks)
+        else:
+            pool = ProcessPoolExecutor(min(self.workers, len(tasks)))
+            finished = (future.result() for future in as_completed([pool.submit(_optimize_group, t) for t in tasks]))
+        try:
+            for done, summaries in enumerate(finished, 1):
+                layers.extend(summaries)
+                if report:
+                    first, last = summaries[0]["layer"], summaries[-1]["layer"]
+                    failed = sum("error" in s for s in summaries)
+                    report(f"group {done}/{len(tasks)}: layers {first}-{last} done"
+                           + (f", {failed} failed" if failed else ""))
+        finally:
+            if self.workers > 1 and len(tasks) > 1:
+                pool.shutdown()
+
+        layers.sort(key=lambda s: s["layer"])
+        ok = [s for s in layers if "error" not in s]
+        starts = {}
+        for s in ok:
+            kind = s["start"].split(":")[0]
+            starts[kind] = starts.get(kind, 0) + 1
+        return {
+            "layers": len(layers),
+            "groups": len(groups),
+            "group_size": self.chunk_size(),
+            "group_layers": [len(group) for group in groups],
+            "failed": len(layers) - len(ok),
+            "starts": starts,
+            "warm_skipped": sum("warm_skipped" in s for s in ok),
+            "final_fitness": sum(s["final_fitness"] for s in ok),
+            "generations": sum(s["generations"] for s in ok),
+            "layer_seconds": round(sum(s["seconds"] for s in ok), 3),
+            "seconds": round(time.perf_counter() - start, 3),
+            "per_layer": layers,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize a stack of layers, warm-starting each from the one below.")
+    parser.add_argument("inputs", nargs="+", help="layer files, directories or glob patterns, bottom first")
+    parser.add_argument("--zones", nargs="+", default=None,
+                        help="one zone map per layer (files, directories or patterns, in the same order)")
+    parser.add_argument("--out", default="optimized", help="output directory (default: optimized)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds of evolve() per cold layer")
+    parser.add_argument("--generations", type=int, default=None,
+                        help="generation limit per cold layer (default: 10000 without --time-budget)")
+    parser.add_argument("--warm-fraction", type=float, default=0.25,
+                        help="share of the budget for a warm-started layer (default: 0.25)")
+    parser.add_argument("--warm-tolerance", type=float, default=0.0,
+                        help="use the layer below even when it starts up to this much worse than "
+                             "the best other start (default: 0, ties only)")
+    parser.add_argument("--group-size", type=int, default=None,
+                        help="cut groups of same-size layers into chunks of this many "
+                             "(default: the layers split evenly over --jobs)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed; layer i uses seed + i")
+    parser.add_argument("--strategy", choices=("greedy", "anneal", "tabu"), default=None,
+                        help="search strategy for evolve() (default: plain greedy mutate)")
+    parser.add_argument("--summary", default=None, help="report JSON path (default: OUT/stack_summary.json)")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    files = sorted(expand_inputs(args.inputs), key=natural_key)
+    if not files:
+        parser.error("no layer files matched")
+    zone_files = None
+    if args.zones:
+        zone_files = sorted(expand_inputs(args.zones), key=natural_key)
+    generations = args.generations
+    if generations is None and args.time_budget is None:
+        generations = 10000
+
+    try:
+        stack = StackOptimizer(
+            files, args.out, zone_files, generations, args.time_budget, args.warm_fraction,
+            args.group_size, args.jobs, args.seed, args.strategy, args.format, toolpath_options(args),
+            args.warm_tolerance,
+        )
+    except ValueError as err:
+        parser.error(str(err))
+    report = stack.run()
+
+    for s in report["per_layer"]:
+        if "error" in s:
+            print(f"{s['file']}: FAILED {s['error']}")
+        else:
+            skipped = f", warm start at {s['warm_skipped']} skipped" if "warm_skipped" in s else ""
+            print(f"{s['file']}: {s['start']} at {s['start_fitness']} -> {s['final_fitness']} "
+                  f"in {s['seconds']}s ({s['generations']} generations{skipped})")
+    print(f"{report['layers']} layers in {report['groups']} groups of {report['group_layers']}, {report['seconds']}s "
+          f"({report['layer_seconds']}s of layer work), starts {report['starts']}, "
+          f"{report['warm_skipped']} warm starts skipped, total fitness {report['final_fitness']}")
+
+    summary_path = args.summary or os.path.join(args.out, "stack_summary.json")
+    with open(summary_path, "w") as f:
+        json.dump(report, f, indent=2, default=float)
+    print(f"Report written to {summary_path}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from Flip_Transpose import HamiltonianSTL
+from GA3 import HamiltonianZoningWithEdges
+
+# Divide and conquer for large grids.
+#
+# A move only changes the edges inside its window, and it keeps each cell's
+# degree and the endpoint pairing inside the window, so it never breaks the
+# global path. A tile cut out of the grid can therefore be optimized on its
+# own with only the windows that lie fully inside it: the edges across tile
+# boundaries never change, and writing each tile's edges back is the whole
+# stitch. Windows that straddle a boundary are picked up afterwards by a
+# seam pass over narrow bands centred on the boundaries, first the vertical
+# seams, then the horizontal ones. Within a pass the regions do not overlap
+# and run in parallel.
+
+
+def _optimize_region(task):
+    width, height, packed, zone_map, cost_model, generations, seed = task
+    random.seed(seed)
+    zoning = HamiltonianZoningWithEdges(
+        HamiltonianSTL.unpack(width, height, packed), zone_map=zone_map, track_path=False,
+        cost_model=cost_model,
+    )
+    if generations > 0:
+        zoning.evolve(generations)
+    return zoning.h.pack()
+
+
+class TiledOptimizer:
+    def __init__(self, zoning, tile_size=256, seam_margin=3, workers=None, seed=None):
+        if tile_size < 3:
+            raise ValueError("tile_size must be at least 3")
+        if seam_margin < 2:
+            raise ValueError("seam_margin must be at least 2 to cover 3-cell windows")
+        if tile_size < 2 * seam_margin:
+            raise ValueError("tile_size must be at least twice seam_margin so seam bands do not overlap")
+        self.zoning = zoning
+        self.tile_size = tile_size
+        # Seam bands cover seam_margin cells on each side of a boundary.
+        self.seam_margin = seam_margin
+        # workers=0 runs every region in this process.
+        self.workers = os.cpu_count() if workers is None else workers
+        self.rng = random.Random(seed)
+
+    def tiles(self):
+        # (x0, y0, x1, y1) cell ranges, end-exclusive.
+        size, width, height = self.tile_size, self.zoning.width, self.zoning.height
+        return [
+            (x0, y0, min(x0 + size, width), min(y0 + size, height))
+            for y0 in range(0, height, size)
+            for x0 in range(0, width, size)
+        ]
+
+    def seam_bands(self):
+        # Vertical seam bands, then horizontal ones, each spanning the grid.
+        size, margin = self.tile_size, self.seam_margin
+        width, height = self.zoning.width, self.zoning.height
+        vertical = [(max(0, s - margin), 0, min(width, s + margin), height) for s in range(size, width, size)]
+        horizontal = [(0, max(0, s - margin), width, min(height, s + margin)) for s in range(size, height, size)]
+        return vertical, horizontal
+
+    def _task(self, region, moves_per_cell):
+        x0, y0, x1, y1 = region
+        grid = HamiltonianSTL(x1 - x0, y1 - y0, use_zigzag=False)
+        grid.H[:] = self.zoning.h.H[y0:y1, x0:x1 - 1]
+        grid.V[:] = self.zoning.h.V[y0:y1 - 1, x0:x1]
+        zone_map = self.zoning.zone_map[y0:y1, x0:x1]
+        generations = int(moves_per_cell * grid.width * grid.height)
+        return (grid.width, grid.height, grid.pack(), zone_map, self.zoning.cost_model, generations,
+                self.rng.getrandbits(32))
+
+    def _stitch(self, region, packed):
+        x0, y0, x1, y1 = region
+        grid = HamiltonianSTL.unpack(x1 - x0, y1 - y0, packed)
+        self.zoning.h.H[y0:y1, x0:x1 - 1] = grid.H
+        self.zoning.h.V[y0:y1 - 1, x0:x1] = grid.V
+
+    def _run(self, pool, regions, moves_per_cell):
+        tasks = [self._task(region, moves_per_cell) for region in regions]
+        if pool is None:
+            results = map(_optimize_region, tasks)
+        else:
+            results = pool.map(_optimize_region, tasks)
+        for region, packed in zip(regions, results):
+            self._stitch(region, packed)
+
+    def evolve(self, moves_per_cell=1.0, seam_moves_per_cell=None):
+        # Runs about moves_per_cell mutations per cell in every tile, then
+        # seam_moves_per_cell (default the same) in every seam band.
+        if seam_moves_per_cell is None:
+            seam_moves_per_cell = moves_per_cell
+        vertical, horizontal = self.seam_bands()
+        # Regions score crossings exactly, but a cost model's turn and run
+        # terms at a region's edge cannot see the fixed edges just outside
+        # it, so with a model the result is checked and the old edges kept
+        # if the whole grid came out worse.
+        before = None
+        if self.zoning.cost_model is not None:
+            before = (self.zoning.fitness, self.zoning.h.H.copy(), self.zoning.h.V.copy())
+
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+        try:
+            self._run(pool, self.tiles(), moves_per_cell)
+            for bands in (vertical, horizontal):
+                if bands:
+                    self._run(pool, bands, seam_moves_per_cell)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.zoning.adopt_edges(self.zoning.h)
+        if before is not None and self.zoning.fitness > before[0]:
+            self.zoning.restore_edges(before[1], before[2])
+        return self.zoning.fitness
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Printer toolpaths from a path order. Consecutive unit moves in the same
+# direction merge into one straight run, so only the cells where the path
+# turns (plus its two ends) become commands. The order is processed in
+# chunks and each chunk's lines are written as soon as they are formatted,
+# so memory stays at one chunk of text however large the layer is.
+
+CHUNK = 1 << 16
+
+
+def run_vertices(order, width, chunk=CHUNK):
+    # Yields (k, 2) int arrays of the (x, y) cells where a run starts or
+    # ends, in path order, one array per chunk of the order.
+    order = np.asarray(order, dtype=np.int64)
+    n = len(order)
+    for start in range(0, n, chunk):
+        p = np.arange(start, min(start + chunk, n))
+        keep = (p == 0) | (p == n - 1)
+        inner = ~keep
+        q = p[inner]
+        keep[inner] = (order[q] - order[q - 1]) != (order[q + 1] - order[q])
+        cells = order[p[keep]]
+        yield np.column_stack((cells % width, cells // width))
+
+
+def count_commands(order, width):
+    return sum(len(vertices) for vertices in run_vertices(order, width))
+
+
+def write_gcode(file_path, order, width, scale=1.0, offset=(0.0, 0.0), feed=None, decimals=3):
+    # Cell (x, y) maps to (offset[0] + x * scale, offset[1] + y * scale).
+    # A G0 travel to the first cell, then one G1 per run. Returns the number
+    # of motion commands written.
+    ox, oy = offset
+    fmt = f"G1 X%.{decimals}f Y%.{decimals}f\n"
+    commands = 0
+    with open(file_path, "w") as f:
+        f.write("G21 ; millimetres\nG90 ; absolute positioning\n")
+        for vertices in run_vertices(order, width):
+            if not len(vertices):
+                continue
+            xs = ox + vertices[:, 0] * scale
+            ys = oy + vertices[:, 1] * scale
+            lines = [fmt % xy for xy in zip(xs.tolist(), ys.tolist())]
+            if commands == 0:
+                lines[0] = "G0" + lines[0][2:]
+                if feed is not None and len(lines) > 1:
+                    lines[1] = lines[1].rstrip("\n") + f" F{feed:g}\n"
+            f.write("".join(lines))
+            commands += len(lines)
+    return commands
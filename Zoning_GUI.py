@@ -0,0 +1,455 @@
+import random
+import threading
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.patches import Circle
+from matplotlib.widgets import Button
+from Cost_Model import CostModel
+from GA3 import GCODE_EXTENSIONS
+
+# Everything that needs matplotlib or tkinter. GA3 imports this module only
+# when a window is opened, so the optimization core stays GUI-free.
+
+FILE_TYPES = [("Text Files", "*.txt"), ("Layer Files", "*.hpl")]
+SAVE_FILE_TYPES = FILE_TYPES + [("G-code Toolpaths", "*.gcode")]
+# Millimetres per cell and machine origin used when saving G-code.
+TOOLPATH_OPTIONS = {"scale": 1.0, "offset": (0.0, 0.0), "feed": None}
+ZONE_FILE_TYPES = [("Zone Maps", "*.txt *.csv"), ("NumPy Arrays", "*.npy"), ("Layer Files", "*.hpl")]
+
+# The Run button optimizes for up to RUN_SECONDS in a worker thread and the
+# window redraws at most every REDRAW_INTERVAL seconds while it runs.
+RUN_SECONDS = 60
+REDRAW_INTERVAL = 0.2
+
+# Cell colours by zone, in order of zone id; cycles past the end.
+ZONE_COLORS = ["royalblue", "seagreen", "darkorange", "orchid", "goldenrod", "slategray", "sienna", "teal"]
+
+
+def plot(zoning, title="Hamiltonian Path"):
+    fig, ax = plt.subplots()
+    zoning.ax = ax
+    plt.subplots_adjust(bottom=0.3)
+    show_on_ax(zoning, ax)
+
+    btn_load_ax = plt.axes([0.03, 0.05, 0.17, 0.075])
+    btn_load = Button(btn_load_ax, 'Load File', color='lightgray', hovercolor='gray')
+    btn_load.on_clicked(lambda event: load_edges_from_file(zoning, zoning.ax))
+
+    btn_zones_ax = plt.axes([0.22, 0.05, 0.17, 0.075])
+    btn_zones = Button(btn_zones_ax, 'Load Zones', color='lightgray', hovercolor='gray')
+    btn_zones.on_clicked(lambda event: load_zone_map_from_file(zoning, zoning.ax))
+
+    btn_save_ax = plt.axes([0.41, 0.05, 0.17, 0.075])
+    btn_save = Button(btn_save_ax, 'Save Path', color='lightgray', hovercolor='gray')
+    btn_save.on_clicked(lambda event: save_path_to_file(zoning))
+
+    btn_run_ax = plt.axes([0.60, 0.05, 0.17, 0.075])
+    btn_run = Button(btn_run_ax, '▶ Run', color='#98FB98', hovercolor='#90EE90')
+    btn_run.on_clicked(lambda event: run_optimizer(zoning))
+
+    btn_cancel_ax = plt.axes([0.79, 0.05, 0.17, 0.075])
+    btn_cancel = Button(btn_cancel_ax, '■ Cancel', color='#F4A6A6', hovercolor='#F08080')
+    btn_cancel.on_clicked(lambda event: cancel_run(zoning))
+
+    plt.show()
+
+
+def _busy(zoning):
+    run = getattr(zoning, '_run', None)
+    if run is not None and run.running():
+        print("Optimizer is running; cancel it first.")
+        return True
+    return False
+
+
+def run_optimizer(zoning, generations=None, time_budget=RUN_SECONDS, **options):
+    # Starts evolve() in the background; options go to evolve().
+    if _busy(zoning):
+        return None
+    zoning._run = BackgroundRun(zoning, zoning._view, generations, time_budget, **options)
+    zoning._run.start()
+    return zoning._run
+
+
+def cancel_run(zoning):
+    run = getattr(zoning, '_run', None)
+    if run is None or not run.running():
+        print("Nothing to cancel.")
+        return
+    run.cancel()
+
+
+class BackgroundRun:
+    # evolve() on a worker thread. The worker never touches matplotlib: its
+    # stats callback copies the edges into `latest` at most every `interval`
+    # seconds, and a canvas timer on the GUI thread draws the newest copy.
+    # Cancel sets the event evolve() checks every generation.
+    def __init__(self, zoning, view, generations=None, time_budget=RUN_SECONDS,
+                 interval=REDRAW_INTERVAL, **options):
+        self.zoning = zoning
+        self.view = view
+        self.interval = interval
+        self.stop = threading.Event()
+        self.latest = None
+        self.error = None
+        self._published = 0.0
+        self._saved_stats = None
+        self.thread = threading.Thread(
+            target=self._work, args=(generations, time_budget, options), daemon=True
+        )
+        self.timer = view.canvas.new_timer(interval=int(interval * 1000))
+        self.timer.add_callback(self._tick)
+
+    def start(self):
+        # The run's stats replace the zoning's own until _work ends.
+        self._saved_stats = self.zoning.stats
+        self.zoning.instrument(self._publish, every=64)
+        self.view.set_status("Running…")
+        self.view.show()
+        self.thread.start()
+        self.timer.start()
+
+    def cancel(self):
+        self.stop.set()
+
+    def running(self):
+        return self.thread.is_alive()
+
+    def _work(self, generations, time_budget, options):
+        try:
+            self.zoning.evolve(generations, time_budget=time_budget, stop=self.stop, **options)
+        except Exception as err:
+            self.error = err
+        finally:
+            self.zoning.stats = self._saved_stats
+
+    def _publish(self, event):
+        # Worker thread.
+        now = time.perf_counter()
+        if event["final"] or now - self._published >= self.interval:
+            self._published = now
+            self.latest = (self.zoning.h.H.copy(), self.zoning.h.V.copy(), event)
+
+    def _tick(self):
+        # GUI thread.
+        latest, self.latest = self.latest, None
+        if latest is not None:
+            H, V, event = latest
+            self.view.refresh(H, V)
+            self.view.set_status(f"{self._status(event)}, est. {format_seconds(self.view.print_time(H, V))}")
+            self.view.show()
+        if self.thread.is_alive():
+            return
+        self.timer.stop()
+        self.view.refresh()
+        if self.error is not None:
+            self.view.set_status(f"Run failed: {self.error}")
+        else:
+            state = "Cancelled" if self.stop.is_set() else "Done"
+            self.view.set_status(f"{state}: {self.view.summary()}, "
+                                 f"{self.zoning.generations_run} generations")
+        self.view.show()
+
+    @staticmethod
+    def _status(event):
+        rate = event["generations_per_sec"] or 0
+        return f"fitness {event['fitness']:g} (best {event['best_fitness']:g}), {rate:,.0f} gen/s"
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def save_path_to_file(zoning):
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    if _busy(zoning):
+        return
+    file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=SAVE_FILE_TYPES)
+    if not file_path:
+        print("Save cancelled.")
+        return
+
+    try:
+        if file_path.endswith(GCODE_EXTENSIONS):
+            zoning.save_path(file_path, **TOOLPATH_OPTIONS)
+        else:
+            zoning.save_path(file_path)
+    except ValueError as err:
+        print("Save failed:", err)
+        return
+    print(f"Path saved to {file_path}")
+
+
+def load_edges_from_file(zoning, ax):
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    if _busy(zoning):
+        return
+    file_path = filedialog.askopenfilename(filetypes=FILE_TYPES)
+    if not file_path:
+        print("No file selected.")
+        return
+
+    print("Loading file:", file_path)
+    zoning.load_edges(file_path)
+    print(f"Resizing grid to {zoning.width}x{zoning.height}")
+    print(f"Generated path length: {len(zoning.path)}")
+
+    ax.clear()
+    show_on_ax(zoning, ax)
+    plt.draw()
+
+
+def load_zone_map_from_file(zoning, ax):
+    import tkinter as tk
+    from tkinter import filedialog
+
+    root = tk.Tk()
+    root.withdraw()
+    if _busy(zoning):
+        return
+    file_path = filedialog.askopenfilename(filetypes=ZONE_FILE_TYPES)
+    if not file_path:
+        print("No file selected.")
+        return
+
+    try:
+        zoning.load_zone_map(file_path)
+    except ValueError as err:
+        print("Invalid zone map:", err)
+        return
+    print(f"Loaded {len(np.unique(zoning.zone_map))} zones, {zoning.fitness} crossings")
+
+    ax.clear()
+    show_on_ax(zoning, ax)
+    plt.draw()
+
+
+def zone_colors(zone_map):
+    ids, rank = np.unique(zone_map, return_inverse=True)
+    return np.array(ZONE_COLORS, dtype=object)[rank.reshape(-1) % len(ZONE_COLORS)]
+
+
+def show_on_ax(zoning, ax):
+    if getattr(zoning, '_view', None) is not None:
+        zoning._view.close()
+    zoning._view = PathView(zoning, ax)
+
+
+def run_method_placeholder(zoning):
+    view = zoning._view
+    # Top-right transpose
+    x_top, y_top = zoning.width - 3, 0
+    if x_top >= 0 and y_top + 2 < zoning.height:
+        subgrid_top = zoning.h.get_subgrid_by_corners((x_top, y_top), (x_top + 2, y_top + 2))
+        view.highlight(subgrid_top, color='orange')
+        view.show(pause=1.5)
+
+        _, result_top = zoning.h.transpose_subgrid(subgrid_top)
+        print("Top-right transpose result:", result_top)
+
+        if result_top == "transposed":
+            zoning.splice_path(x_top, y_top, 3, 3)
+        zoning.refresh_fitness()
+        view.refresh()
+        view.highlight(subgrid_top, color='green')
+        view.show(pause=1.0)
+
+        x = zoning.width - 3
+        y = zoning.height - 4 
+
+        if x < 0 or y < 0 or x + 2 >= zoning.width or y + 2 >= zoning.height:
+            print("Corrected Bottom-right 3x3 subgrid is out of bounds.")
+            return
+
+        subgrid = zoning.h.get_subgrid_by_corners((x, y), (x + 2, y + 2))
+
+        view.highlight(subgrid, color='orange')
+        view.show(pause=1.5)
+
+        _, result = zoning.h.transpose_subgrid(subgrid)
+        print("Corrected Bottom-right transpose result:", result)
+
+        if result == "transposed":
+            zoning.splice_path(x, y, 3, 3)
+        zoning.refresh_fitness()
+        view.refresh()
+        view.highlight(subgrid, color='green')
+        view.show()
+
+
+def animate_transposes(zoning, ax):
+    view = zoning._view if getattr(zoning, '_view', None) and zoning._view.ax is ax else PathView(zoning, ax)
+
+    for _ in range(3):
+        x = random.randint(0, zoning.width - 3)
+        y = random.randint(0, zoning.height - 3)
+        subgrid = zoning.h.get_subgrid_by_corners((x, y), (x + 2, y + 2))
+
+        view.highlight(subgrid, color='orange')
+        view.show(pause=2)
+
+        _, result = zoning.h.transpose_subgrid(subgrid)
+        if result == "transposed":
+            zoning.splice_path(x, y, 3, 3)
+        zoning.refresh_fitness()
+
+        view.refresh()
+        view.highlight(subgrid, color='green')
+        view.show(pause=1)
+
+    view.highlight(None)
+    view.show()
+
+
+class PathView:
+    # Draws the edges as one LineCollection of straight runs (plus red unit
+    # segments where an edge crosses zones) and the cells as one scatter.
+    # The collection and highlight are animated artists blitted over a cached
+    # background; refresh() recomputes runs only in the rows and columns
+    # whose edges changed since the last refresh.
+    def __init__(self, zoning, ax):
+        self.zoning = zoning
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        zone_map = zoning.zone_map
+
+        ax.set_title("Hamiltonian Path", fontsize=14, fontweight='bold')
+        ys, xs = np.indices(zone_map.shape)
+        ax.scatter(
+            xs.ravel(), ys.ravel(), s=50, zorder=2, edgecolors='k',
+            c=zone_colors(zone_map).tolist(),
+        )
+        self.lines = LineCollection([], linewidths=2, zorder=1, animated=True)
+        ax.add_collection(self.lines)
+        self.marks = PatchCollection([], zorder=3, animated=True)
+        ax.add_collection(self.marks)
+        self.status = ax.text(
+            0.01, 0.01, "", transform=ax.transAxes, fontsize=9, zorder=4, animated=True,
+            bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'),
+        )
+
+        ax.set_aspect('equal')
+        ax.grid(True, which='major', linestyle='--', alpha=0.4)
+        ax.set_facecolor('#f8f9fa')
+        ax.invert_yaxis()
+
+        self.background = None
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+        self._shown_h = None
+        self._shown_v = None
+        self.refresh()
+
+    def refresh(self, H=None, V=None):
+        # Draws the zoning's edges, or H and V if given (a snapshot taken
+        # by a background run). Live edges also update the status line.
+        zoning = self.zoning
+        if H is None:
+            H, V = zoning.h.H, zoning.h.V
+            self.set_status(self.summary())
+        if self._shown_h is None or self._shown_h.shape != H.shape or self._shown_v.shape != V.shape:
+            self._h_paths = [(None, None)] * H.shape[0]
+            self._v_paths = [(None, None)] * V.shape[1]
+            rows, cols = range(H.shape[0]), range(V.shape[1])
+        else:
+            rows = np.flatnonzero((H != self._shown_h).any(axis=1)).tolist()
+            cols = np.flatnonzero((V != self._shown_v).any(axis=0)).tolist()
+        self._shown_h = H.copy()
+        self._shown_v = V.copy()
+
+        # One polyline per row (H edges) or column (V edges) and colour, with
+        # NaN rows breaking it between runs.
+        for y in rows:
+            runs, crossings = self._runs(H[y], zoning._cross_h[y])
+            self._h_paths[y] = (
+                self._polyline([(s, y, e, y) for s, e in runs]),
+                self._polyline([(x, y, x + 1, y) for x in crossings]),
+            )
+        for x in cols:
+            runs, crossings = self._runs(V[:, x], zoning._cross_v[:, x])
+            self._v_paths[x] = (
+                self._polyline([(x, s, x, e) for s, e in runs]),
+                self._polyline([(x, y, x, y + 1) for y in crossings]),
+            )
+
+        parts = self._h_paths + self._v_paths
+        black = [b for b, _ in parts if b is not None]
+        red = [r for _, r in parts if r is not None]
+        self.lines.set_segments(black + red)
+        colors = np.zeros((len(black) + len(red), 4))
+        colors[:, 3] = 1.0
+        colors[len(black):, 0] = 1.0
+        self.lines.set_color(colors)
+
+    @staticmethod
+    def _runs(edges, cross):
+        # Maximal runs of set edges as (first cell, last cell), plus the
+        # indices of set edges that cross zones.
+        steps = np.diff(np.concatenate(([0], edges.astype(np.int8), [0])))
+        runs = zip(np.flatnonzero(steps == 1).tolist(), np.flatnonzero(steps == -1).tolist())
+        return list(runs), np.flatnonzero(edges & cross).tolist()
+
+    @staticmethod
+    def _polyline(segments):
+        if not segments:
+            return None
+        points = np.full((len(segments), 3, 2), np.nan)
+        points[:, :2] = np.array(segments, dtype=float).reshape(-1, 2, 2)
+        return points.reshape(-1, 2)[:-1]
+
+    def print_time(self, H=None, V=None):
+        zoning = self.zoning
+        if H is None:
+            return zoning.estimated_print_time()
+        model = zoning.cost_model if zoning.cost_model is not None else CostModel()
+        return model.print_time(H, V)
+
+    def summary(self):
+        zoning = self.zoning
+        return (f"{zoning.compute_crossings()} crossings, "
+                f"est. print time {format_seconds(self.print_time())}")
+
+    def highlight(self, subgrid, color='orange'):
+        points = [pt for row in subgrid or [] for pt in row if pt]
+        self.marks.set_paths([Circle(pt, 0.4) for pt in points])
+        self.marks.set_facecolor(color)
+        self.marks.set_edgecolor('black')
+        self.marks.set_alpha(0.4)
+        self.marks.set_linewidth(1.5)
+
+    def set_status(self, text):
+        self.status.set_text(text)
+
+    def close(self):
+        self.canvas.mpl_disconnect(self._cid)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        self.ax.draw_artist(self.lines)
+        self.ax.draw_artist(self.marks)
+        self.ax.draw_artist(self.status)
+
+    def show(self, pause=0):
+        if self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_animated()
+            self.canvas.blit(self.ax.bbox)
+        self.canvas.flush_events()
+        if pause:
+            self.canvas.start_event_loop(pause)